@@ -1,4 +1,7 @@
 from .charity_project import router as charity_router # noqa
 from .donation import router as donation_router # noqa
 from .google_sheets import router as google_sheets_router # noqa
+from .metrics import router as metrics_router # noqa
+from .slow_queries import router as slow_queries_router # noqa
+from .stats import router as stats_router # noqa
 from .user import router as user_router # noqa
@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_async_session
 from app.core.user import current_superuser
 from app.crud.charity_project import charity_project_crud
+from app.models import CharityProject
 from app.schemas.charity_project import (
     CharityProjectCreate, CharityProjectCreateDB, CharityProjectDB,
     CharityProjectUpdate, GetCharityProjectDB
 )
 from app.services.donation_service import InvestingService
-from app.api.utils import get_existing_project_or_404
+from app.services.export import (
+    EXPORT_MEDIA_TYPES, ExportFormat, stream_export
+)
+from app.services.fast_json import dump_list
+from app.services.project_cache import project_list_cache
+from app.api.utils import (
+    ListParams, get_existing_project_or_404, list_or_404, parse_bulk_body
+)
 
 
 router = APIRouter()
@@ -17,15 +26,39 @@ router = APIRouter()
 
 @router.get('/', response_model=list[GetCharityProjectDB])
 async def get_all_charity_projects(
+    request: Request,
+    params: ListParams = Depends(),
     session: AsyncSession = Depends(get_async_session)
 ):
-    projects = await charity_project_crud.get_multi(session)
-    if not projects:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='Ещё нет проектов.'
+    """Ответ кэшируется и поддерживает If-None-Match."""
+    async def load_projects():
+        projects = await dump_list(
+            session, charity_project_crud, GetCharityProjectDB,
+            **params.dict()
         )
-    return projects
+        return list_or_404(projects, 'Ещё нет проектов.', **params.dict())
+
+    return await project_list_cache.respond(
+        request, tuple(params.dict().items()), load_projects
+    )
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    dependencies=[Depends(current_superuser)]
+)
+async def export_charity_projects(
+    export_format: ExportFormat = ExportFormat.ndjson,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Только для суперюзеров."""
+    return StreamingResponse(
+        stream_export(
+            session, CharityProject, CharityProjectDB, export_format
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format]
+    )
 
 
 @router.post(
@@ -43,6 +76,25 @@ async def create_charity_project(
     return await service.create_new_project(obj_in=charity_project)
 
 
+@router.post(
+    '/bulk',
+    response_model=list[CharityProjectCreateDB],
+    dependencies=[Depends(current_superuser)],
+    response_model_exclude_none=True
+)
+async def create_charity_projects(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Только для суперюзеров.
+
+    Принимает JSON-массив или NDJSON (`Content-Type: application/x-ndjson`).
+    """
+    objs_in = await parse_bulk_body(request, CharityProjectCreate)
+    service = InvestingService(session=session)
+    return await service.create_new_projects(objs_in=objs_in)
+
+
 @router.patch(
     '/{project_id}',
     response_model=CharityProjectDB,
@@ -1,12 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.utils import (
+    ListParams, get_user_donation_or_404, list_or_404, parse_bulk_body
+)
 from app.core.db import get_async_session
 from app.core.user import current_superuser, current_user
 from app.crud.donation import donation_crud
-from app.models import User
-from app.schemas.donation import AllDonationsDB, DonationCreate, UserDonationDB
+from app.crud.investment import investment_crud
+from app.models import Donation, User
+from app.schemas.donation import (
+    AllDonationsDB, DonationAllocationDB, DonationCreate, DonationImport,
+    DonationImportResult, DonationStatusDB, UserDonationDB
+)
 from app.services.donation_service import InvestingService
+from app.services.export import (
+    EXPORT_MEDIA_TYPES, ExportFormat, stream_export
+)
+from app.services.fast_json import dump_list
 
 
 router = APIRouter()
@@ -17,15 +31,23 @@ router = APIRouter()
     response_model=list[AllDonationsDB],
     dependencies=[Depends(current_superuser)]
 )
-async def get_all_donations(session: AsyncSession = Depends(get_async_session)):
+async def get_all_donations(
+    params: ListParams = Depends(),
+    user_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_session)
+):
     """Только для суперюзера."""
-    donations = await donation_crud.get_multi(session)
-    if not donations:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='Ещё нет пожертвований.'
-        )
-    return donations
+    donations = await dump_list(
+        session, donation_crud, AllDonationsDB,
+        user_id=user_id, **params.dict()
+    )
+    return Response(
+        content=list_or_404(
+            donations, 'Ещё нет пожертвований.',
+            user_id=user_id, **params.dict()
+        ),
+        media_type='application/json'
+    )
 
 
 @router.post(
@@ -43,13 +65,81 @@ async def create_donation(
     return await service.create_new_donation(obj_in=donation, user=user)
 
 
+@router.post(
+    '/bulk',
+    response_model=DonationImportResult
+)
+async def import_donations(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_superuser)
+):
+    """Только для суперюзера.
+
+    Принимает JSON-массив или NDJSON (`Content-Type: application/x-ndjson`).
+    Пожертвования без `user_id` записываются на суперюзера.
+    """
+    objs_in = await parse_bulk_body(request, DonationImport)
+    service = InvestingService(session=session)
+    return await service.import_donations(objs_in=objs_in, user=user)
+
+
 @router.get(
     '/my',
     response_model=list[UserDonationDB]
 )
 async def get_user_donations(
+    params: ListParams = Depends(),
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_user)
 ):
     """Только для авторизованных пользователей."""
-    return await donation_crud.get_multi(session, user)
+    return await donation_crud.get_multi(session, user, **params.dict())
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    dependencies=[Depends(current_superuser)]
+)
+async def export_donations(
+    export_format: ExportFormat = ExportFormat.ndjson,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Только для суперюзера."""
+    return StreamingResponse(
+        stream_export(session, Donation, AllDonationsDB, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format]
+    )
+
+
+@router.get(
+    '/{donation_id}/status',
+    response_model=DonationStatusDB
+)
+async def get_donation_status(
+    donation_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_user)
+):
+    """Только для автора пожертвования и суперюзера."""
+    return await get_user_donation_or_404(
+        donation_id, user, session,
+        columns=[*DonationStatusDB.__fields__, 'user_id']
+    )
+
+
+@router.get(
+    '/{donation_id}/allocations',
+    response_model=list[DonationAllocationDB]
+)
+async def get_donation_allocations(
+    donation_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_user)
+):
+    """Только для автора пожертвования и суперюзера."""
+    await get_user_donation_or_404(
+        donation_id, user, session, columns=['id', 'user_id']
+    )
+    return await investment_crud.get_by_donation(donation_id, session)
@@ -7,8 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.db import get_async_session
 from app.core.google_client import get_service
 from app.core.user import current_superuser
-from app.crud import charity_project_crud
-from app.services.google_sheets import google_service
+from app.services.google_sheets import google_service, report_cache
 
 
 router = APIRouter()
@@ -25,19 +24,20 @@ async def get_report(
 
 ):
     """Только для суперюзеров."""
-    closed_projects = (
-        await charity_project_crud.get_projects_by_completion_rate(session)
-    )
+    closed_projects = await report_cache.get_closed_projects(session)
     if not closed_projects:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Нет закрытых проектов.'
         )
-    spreadsheetid = await google_service.spreadsheets_create(wrapper_services)
+    table_values = google_service.make_table_values(closed_projects)
+    spreadsheetid = await google_service.spreadsheets_create(
+        table_values, wrapper_services
+    )
     await google_service.set_user_permissions(spreadsheetid, wrapper_services)
     await google_service.spreadsheets_update_value(
         spreadsheetid,
-        closed_projects,
+        table_values,
         wrapper_services
     )
     return closed_projects
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_session
+from app.core.slow_queries import explain, slow_query_log
+from app.core.user import current_superuser
+from app.schemas.slow_query import SlowQueryDB
+
+
+router = APIRouter()
+
+
+@router.get(
+    '/',
+    response_model=list[SlowQueryDB],
+    dependencies=[Depends(current_superuser)]
+)
+async def get_slow_queries(
+    limit: int = Query(10, ge=1),
+    with_plan: bool = False,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Только для суперюзеров. Последние медленные запросы, новые первыми.
+
+    `with_plan` добавляет к каждому запросу результат EXPLAIN.
+    """
+    queries = list(slow_query_log)[:limit]
+    if with_plan:
+        queries = [
+            dict(query, plan=await explain(session, query))
+            for query in queries
+        ]
+    return queries
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_session
+from app.core.user import current_superuser
+from app.crud import fund_stats_crud
+from app.schemas.fund_stats import FundStatsDB
+
+
+router = APIRouter()
+
+
+@router.get(
+    '/',
+    response_model=FundStatsDB,
+    dependencies=[Depends(current_superuser)]
+)
+async def get_fund_stats(session: AsyncSession = Depends(get_async_session)):
+    """Только для суперюзеров."""
+    return await fund_stats_crud.get_stats(session)
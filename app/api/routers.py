@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 
 from app.api.endpoints import (
-    charity_router, donation_router, google_sheets_router, user_router
+    charity_router, donation_router, google_sheets_router, metrics_router,
+    slow_queries_router, stats_router, user_router
 )
 
 
@@ -16,3 +17,10 @@ main_router.include_router(
 main_router.include_router(
     google_sheets_router, prefix='/google', tags=['Google']
 )
+main_router.include_router(
+    stats_router, prefix='/stats', tags=['Stats']
+)
+main_router.include_router(metrics_router)
+main_router.include_router(
+    slow_queries_router, prefix='/slow_queries', tags=['Slow queries']
+)
@@ -1,7 +1,73 @@
-from fastapi import HTTPException, status
+import json
+from datetime import datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError, parse_obj_as
+from pydantic.error_wrappers import ErrorWrapper
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud import charity_project_crud
+from app.constants import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from app.crud import charity_project_crud, donation_crud
+from app.models import User
+
+
+class ListParams:
+    """Параметры постраничной выборки и фильтрации списков."""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+        after: Optional[int] = Query(
+            None, description='id последнего объекта предыдущей страницы'
+        ),
+        fully_invested: Optional[bool] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ):
+        self.limit = limit
+        self.after = after
+        self.fully_invested = fully_invested
+        self.created_from = created_from
+        self.created_to = created_to
+
+    def dict(self) -> dict:
+        return vars(self).copy()
+
+
+def list_or_404(body: Optional[bytes], detail: str, **filters) -> bytes:
+    """JSON списка из `dump_list` или 404, если объектов нет совсем.
+
+    Пустой результат с фильтрами или `after` - обычный ответ `[]`.
+    """
+    if body is not None:
+        return body
+    if any(
+        value is not None
+        for name, value in filters.items() if name != 'limit'
+    ):
+        return b'[]'
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+
+async def parse_bulk_body(
+        request: Request,
+        schema: type[BaseModel],
+) -> list:
+    """Разбирает тело запроса: JSON-массив или NDJSON (объект на строку)."""
+    body = await request.body()
+    content_type = request.headers.get('content-type', '')
+    try:
+        if content_type.startswith('application/x-ndjson'):
+            data = [
+                json.loads(line) for line in body.splitlines() if line.strip()
+            ]
+        else:
+            data = json.loads(body)
+        return parse_obj_as(list[schema], data)
+    except (json.JSONDecodeError, ValidationError) as error:
+        raise RequestValidationError([ErrorWrapper(error, loc=('body',))])
 
 
 async def get_existing_project_or_404(
@@ -15,3 +81,22 @@ async def get_existing_project_or_404(
             detail='Проект не найден!'
         )
     return project
+
+
+async def get_user_donation_or_404(
+        donation_id: int,
+        user: User,
+        session: AsyncSession,
+        columns: Optional[Sequence[str]] = None,
+):
+    donation = await donation_crud.get(
+        donation_id, session, columns=columns
+    )
+    if donation is None or (
+        donation.user_id != user.id and not user.is_superuser
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Пожертвование не найдено!'
+        )
+    return donation
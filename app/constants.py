@@ -1,4 +1,8 @@
 MIN_STR_FIELD_LENGTH = 1
 MAX_STR_FIELD_LENGTH = 100
 MIN_INT_FIELD_AMOUNT = 0
-DATE_FORMAT = "%Y/%m/%d %H:%M:%S"
\ No newline at end of file
+DATE_FORMAT = "%Y/%m/%d %H:%M:%S"
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+REPORT_PROJECTS_LIMIT = 100
+BULK_CHUNK_SIZE = 1000
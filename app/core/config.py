@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseSettings
 
@@ -18,6 +18,29 @@ class Settings(BaseSettings):
     auth_provider_x509_cert_url: Optional[str] = None
     client_x509_cert_url: Optional[str] = None
     email: Optional[str] = None
+    pool_size: int = 5
+    pool_max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
+    query_cache_size: int = 500
+    prepared_statement_cache_size: int = 100
+    sqlite_journal_mode: str = 'WAL'
+    sqlite_synchronous: str = 'NORMAL'
+    sqlite_busy_timeout: int = 5000
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 60
+    project_list_cache_size: int = 128
+    project_list_cache_ttl: float = 10
+    report_cache_ttl: float = 60
+    fast_json: bool = True
+    metrics_enabled: bool = False
+    slow_query_threshold: Optional[float] = 0.5
+    slow_query_log_size: int = 50
+    background_allocation: bool = False
+    allocation_interval: float = 1.0
+    allocation_batch_size: int = 1000
+    allocation_engine: Literal['python', 'numpy'] = 'python'
 
     class Config:
         env_file = '.env'
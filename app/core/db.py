@@ -1,8 +1,19 @@
-from sqlalchemy import Column, Integer
+import logging
+import time
+
+from sqlalchemy import Column, Integer, event
+from sqlalchemy.engine import Connection, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
+from sqlalchemy.orm import (
+    Session, declarative_base, declared_attr, sessionmaker
+)
 
 from app.core.config import settings
+from app.core.metrics import record_statement
+from app.core.slow_queries import is_slow, slow_query_log
+
+
+logger = logging.getLogger(__name__)
 
 
 class PreBase:
@@ -16,11 +27,121 @@ class PreBase:
 
 Base = declarative_base(cls=PreBase)
 
-engine = create_async_engine(settings.database_url)
 
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession)
+class RequestSession(Session):
+    """Сессия, которая держит одно соединение до своего закрытия.
+
+    Соединение берётся из пула при первом запросе к БД и не возвращается
+    в пул между commit, поэтому запрос к API занимает не больше одного
+    соединения, а запросы без обращения к БД не занимают ни одного.
+    """
+
+    _request_connection = None
+
+    def get_bind(self, *args, **kwargs):
+        bind = super().get_bind(*args, **kwargs)
+        if isinstance(bind, Connection):
+            return bind
+        connection = self._request_connection
+        if connection is None or connection.closed or connection.invalidated:
+            self._request_connection = bind.connect()
+        return self._request_connection
+
+    def close(self):
+        super().close()
+        if self._request_connection is not None:
+            self._request_connection.close()
+            self._request_connection = None
+
+
+def get_engine_options(url: str) -> dict:
+    """Параметры движка и пула соединений из настроек."""
+    options = {
+        'pool_pre_ping': settings.pool_pre_ping,
+        'pool_recycle': settings.pool_recycle,
+        'query_cache_size': settings.query_cache_size,
+    }
+    if make_url(url).get_driver_name() == 'asyncpg':
+        # Кэш подготовленных выражений asyncpg; за pgbouncer нужен 0.
+        options['connect_args'] = {
+            'prepared_statement_cache_size': (
+                settings.prepared_statement_cache_size
+            ),
+        }
+    if make_url(url).get_backend_name() != 'sqlite':
+        # Для SQLite используются NullPool/StaticPool без размера пула.
+        options.update(
+            pool_size=settings.pool_size,
+            max_overflow=settings.pool_max_overflow,
+            pool_timeout=settings.pool_timeout,
+        )
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f'PRAGMA journal_mode={settings.sqlite_journal_mode}')
+    cursor.execute(f'PRAGMA synchronous={settings.sqlite_synchronous}')
+    cursor.execute(f'PRAGMA busy_timeout={settings.sqlite_busy_timeout}')
+    cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    duration = time.perf_counter() - conn.info['query_start_time'].pop()
+    record_statement(duration)
+    if is_slow(duration):
+        compiled = context.compiled if context is not None else None
+        slow_query_log.add(
+            statement, parameters, compiled, duration, executemany
+        )
+
+
+def instrumentation_enabled() -> bool:
+    """Нужны ли хуки курсора: включены метрики или журнал медленных."""
+    return (
+        settings.metrics_enabled or
+        settings.slow_query_threshold is not None
+    )
+
+
+def instrument_engine(sync_engine) -> None:
+    """Подключает метрики и журнал медленных SQL-запросов."""
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def describe_engine() -> str:
+    options = ', '.join(
+        f'{name}={value}'
+        for name, value in get_engine_options(settings.database_url).items()
+    )
+    return (
+        f'Подключение к {engine.url.get_backend_name()}: '
+        f'пул {engine.pool.status()}, {options}'
+    )
+
+
+engine = create_async_engine(
+    settings.database_url, **get_engine_options(settings.database_url)
+)
+if engine.dialect.name == 'sqlite':
+    event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+if instrumentation_enabled():
+    instrument_engine(engine.sync_engine)
+
+AsyncSessionLocal = sessionmaker(
+    engine, class_=AsyncSession, sync_session_class=RequestSession
+)
 
 
 async def get_async_session():
+    # FastAPI кэширует зависимость в пределах запроса: эндпоинт
+    # и get_user_db получают одну и ту же сессию.
     async with AsyncSessionLocal() as async_session:
         yield async_session
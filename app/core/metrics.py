@@ -0,0 +1,181 @@
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class RequestMetrics:
+    """Счётчики SQL-запросов одного HTTP-запроса."""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+
+request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    'request_metrics', default=None
+)
+request_scope: ContextVar[Optional[dict]] = ContextVar(
+    'request_scope', default=None
+)
+_route_paths = {}
+
+
+def route_path(scope: Optional[dict]) -> str:
+    """Шаблон пути вместо самого пути, чтобы id не плодили метки."""
+    endpoint = scope and scope.get('endpoint')
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    if endpoint not in _route_paths:
+        _route_paths[endpoint] = next((
+            route.path for route in scope['app'].routes
+            if getattr(route, 'endpoint', None) is endpoint
+        ), UNMATCHED_ROUTE)
+    return _route_paths[endpoint]
+
+
+def record_statement(duration: float) -> None:
+    """Учитывает SQL-запрос в метриках текущего HTTP-запроса."""
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics.statements += 1
+        metrics.db_time += duration
+
+
+class Histogram:
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = [
+            f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Метрики запросов по маршрутам в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self._collectors = []
+        self.clear()
+
+    def add_collector(self, collector: Callable[[], list[str]]) -> None:
+        """Добавляет источник строк метрик, например счётчики кэша."""
+        self._collectors.append(collector)
+
+    def clear(self) -> None:
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))
+        self.db_time = defaultdict(float)
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        latency: float,
+        metrics: RequestMetrics,
+    ) -> None:
+        key = (method, route)
+        self.latency[key].observe(latency)
+        self.statements[key].observe(metrics.statements)
+        self.db_time[key] += metrics.db_time
+
+    def render(self) -> str:
+        lines = [
+            '# HELP http_request_duration_seconds Время обработки запроса.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for key, histogram in self.latency.items():
+            lines += histogram.render(
+                'http_request_duration_seconds', _labels(*key)
+            )
+        lines += [
+            '# HELP http_request_sql_statements Число SQL-запросов '
+            'на один запрос.',
+            '# TYPE http_request_sql_statements histogram',
+        ]
+        for key, histogram in self.statements.items():
+            lines += histogram.render(
+                'http_request_sql_statements', _labels(*key)
+            )
+        lines += [
+            '# HELP http_request_sql_seconds_total Суммарное время '
+            'выполнения SQL-запросов.',
+            '# TYPE http_request_sql_seconds_total counter',
+        ]
+        lines += [
+            f'http_request_sql_seconds_total{{{_labels(*key)}}} {db_time}'
+            for key, db_time in self.db_time.items()
+        ]
+        for collector in self._collectors:
+            lines += collector()
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(method: str, route: str) -> str:
+    return f'method="{method}",route="{route}"'
+
+
+class MetricsMiddleware:
+    """ASGI-middleware, собирающее метрики по шаблонам маршрутов.
+
+    Запоминает scope запроса для журнала медленных запросов. При
+    `METRICS_ENABLED=false` запросы передаются приложению без учёта.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        scope_token = request_scope.set(scope)
+        try:
+            if not settings.metrics_enabled:
+                return await self.app(scope, receive, send)
+            await self.__measure(scope, receive, send)
+        finally:
+            request_scope.reset(scope_token)
+
+    async def __measure(self, scope, receive, send):
+        metrics = RequestMetrics()
+        token = request_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_metrics.reset(token)
+            self.registry.observe(
+                scope['method'],
+                route_path(scope),
+                time.perf_counter() - started,
+                metrics,
+            )
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,204 @@
+import logging
+import re
+import sys
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Optional
+
+import greenlet
+from sqlalchemy.exc import DBAPIError, ResourceClosedError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.elements import (
+    BinaryExpression, BindParameter, ColumnClause
+)
+
+from app.core.config import settings
+from app.core.metrics import request_scope, route_path
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_COLUMN = re.compile(r'amount|total|balance')
+REDACTED = '***'
+CALLER_PACKAGES = ('app.crud', 'app.services')
+
+
+def _elements(element, element_type) -> list:
+    return [
+        child for child in visitors.iterate(element)
+        if isinstance(child, element_type)
+    ]
+
+
+def amount_parameters(compiled: SQLCompiler) -> set[str]:
+    """Имена bind-параметров, значения которых попадают в столбцы сумм.
+
+    Столбец определяется по выражению, а не по имени параметра: значения
+    INSERT и SET, а также операнды сравнений и арифметики со столбцом.
+    """
+    targets = defaultdict(set)
+
+    def bind_name(bind: BindParameter) -> str:
+        return compiled.bind_names.get(bind, bind.key)
+
+    statement = compiled.statement
+    table = getattr(statement, 'table', None)
+    if table is not None:
+        # Параметры значений INSERT/UPDATE компилятор называет по столбцу.
+        for name in compiled.bind_names.values():
+            if name in table.c:
+                targets[name].add(name)
+    values = getattr(statement, '_ordered_values', None) or (
+        getattr(statement, '_values', None) or {}
+    ).items()
+    for key, value in values:
+        for bind in _elements(value, BindParameter):
+            targets[bind_name(bind)].add(getattr(key, 'key', key))
+    for binary in _elements(statement, BinaryExpression):
+        for columns_side, binds_side in (
+            (binary.left, binary.right), (binary.right, binary.left)
+        ):
+            columns = [
+                column.key
+                for column in _elements(columns_side, ColumnClause)
+            ]
+            for bind in _elements(binds_side, BindParameter):
+                targets[bind_name(bind)].update(columns)
+    return {
+        name for name, columns in targets.items()
+        if any(AMOUNT_COLUMN.search(column) for column in columns)
+    }
+
+
+def _redact_row(row, names: Optional[tuple], hidden: Optional[set]):
+    if isinstance(row, dict):
+        return {
+            name: REDACTED if hidden is None or name in hidden else value
+            for name, value in row.items()
+        }
+    if names is None or hidden is None:
+        return [REDACTED] * len(row)
+    return [
+        REDACTED if name in hidden else value
+        for name, value in zip(names, row)
+    ]
+
+
+def redact_parameters(
+    parameters,
+    names: Optional[tuple],
+    hidden: Optional[set],
+    executemany: bool = False,
+):
+    """Скрывает суммы среди параметров запроса.
+
+    `names` - имена позиционных параметров, `hidden` - имена скрываемых;
+    None скрывает все значения: у текстового SQL столбцы неизвестны.
+    executemany-параметры - последовательность строк.
+    """
+    if executemany:
+        return [_redact_row(row, names, hidden) for row in parameters]
+    return _redact_row(parameters, names, hidden)
+
+
+def _frames():
+    frame = sys._getframe(1)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    # Асинхронная сессия выполняет запрос в дочернем greenlet: стек
+    # вызывающего кода остался в родительском.
+    parent = greenlet.getcurrent().parent
+    frame = parent.gr_frame if parent is not None else None
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def find_caller() -> Optional[str]:
+    """Метод CRUD или сервиса, из которого выполнен запрос."""
+    for frame in _frames():
+        if frame.f_globals.get('__name__', '').startswith(CALLER_PACKAGES):
+            owner = frame.f_locals.get('self')
+            if owner is None:
+                return frame.f_code.co_name
+            return f'{type(owner).__name__}.{frame.f_code.co_name}'
+    return None
+
+
+class SlowQueryLog:
+    """Последние медленные запросы для логирования и EXPLAIN."""
+
+    def __init__(self, maxsize: int):
+        self._queries = deque(maxlen=maxsize)
+
+    def __iter__(self):
+        return iter(reversed(self._queries))
+
+    def clear(self) -> None:
+        self._queries.clear()
+
+    def add(
+        self,
+        statement: str,
+        parameters,
+        compiled,
+        duration: float,
+        executemany: bool = False,
+    ) -> None:
+        hidden = None
+        if isinstance(compiled, SQLCompiler):
+            hidden = amount_parameters(compiled)
+        query = dict(
+            statement=statement,
+            parameters=redact_parameters(
+                parameters, getattr(compiled, 'positiontup', None), hidden,
+                executemany,
+            ),
+            duration=duration,
+            caller=find_caller(),
+            route=route_path(request_scope.get()),
+            logged_at=datetime.now(),
+        )
+        logger.warning(
+            'Медленный запрос (%.3f с) из %s, маршрут %s: %s; параметры: %s',
+            duration, query['caller'], query['route'], statement,
+            query['parameters'],
+        )
+        # Исходные параметры нужны только для EXPLAIN и наружу не отдаются.
+        self._queries.append(dict(
+            query, raw_parameters=parameters, executemany=executemany
+        ))
+
+
+async def explain(session: AsyncSession, query: dict) -> Optional[list[str]]:
+    """План медленного запроса с его исходными параметрами.
+
+    Для executemany план строится по первой строке параметров. Если
+    запрос не поддаётся EXPLAIN (DDL, сам EXPLAIN), возвращает None.
+    """
+    prefix = 'EXPLAIN'
+    if session.bind.dialect.name == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN'
+    parameters = query['raw_parameters']
+    if query['executemany']:
+        parameters = parameters[0]
+    connection = await session.connection()
+    try:
+        plan = await connection.exec_driver_sql(
+            f'{prefix} {query["statement"]}', parameters
+        )
+        return [str(row[-1]) for row in plan]
+    except (DBAPIError, ResourceClosedError) as error:
+        await session.rollback()
+        logger.warning('Не удалось выполнить EXPLAIN: %s', error)
+        return None
+
+
+def is_slow(duration: float) -> bool:
+    threshold = settings.slow_query_threshold
+    return threshold is not None and duration >= threshold
+
+
+slow_query_log = SlowQueryLog(maxsize=settings.slow_query_log_size)
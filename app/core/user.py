@@ -1,17 +1,24 @@
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
+import jwt
+from cachetools import TTLCache
 from fastapi import Depends, Request
 from fastapi_users import (
-    BaseUserManager, FastAPIUsers, IntegerIDMixin, InvalidPasswordException
+    BaseUserManager, FastAPIUsers, IntegerIDMixin, InvalidPasswordException,
+    exceptions
 )
 from fastapi_users.authentication import (
     AuthenticationBackend, BearerTransport, JWTStrategy
 )
+from fastapi_users.jwt import decode_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.core.config import settings
 from app.core.db import get_async_session
+from app.core.metrics import metrics_registry
 from app.models import User
 from app.schemas.user import UserCreate
 
@@ -20,11 +27,103 @@ async def get_user_db(session: AsyncSession = Depends(get_async_session)):
     yield SQLAlchemyUserDatabase(session, User)
 
 
+class UserCache:
+    """TTL+LRU кэш снимков пользователей для аутентификации."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.enabled = maxsize > 0
+        self._users = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def get(self, user_id: int) -> Optional[User]:
+        """Каждый раз возвращает новый отсоединённый от сессии объект.
+
+        Если его добавить в сессию, изменения запишутся через UPDATE.
+        """
+        values = self._users.get(user_id) if self.enabled else None
+        if values is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, user: User) -> None:
+        if self.enabled:
+            self._users[user.id] = {
+                attr.key: getattr(user, attr.key)
+                for attr in inspect(User).column_attrs
+            }
+
+    def invalidate(self, user_id: Any) -> None:
+        self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._users.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def render_metrics(self) -> list[str]:
+        return [
+            '# HELP user_cache_hits_total Попадания в кэш пользователей.',
+            '# TYPE user_cache_hits_total counter',
+            f'user_cache_hits_total {self.hits}',
+            '# HELP user_cache_misses_total Промахи кэша пользователей.',
+            '# TYPE user_cache_misses_total counter',
+            f'user_cache_misses_total {self.misses}',
+            '# HELP user_cache_hit_ratio Доля попаданий в кэш пользователей.',
+            '# TYPE user_cache_hit_ratio gauge',
+            f'user_cache_hit_ratio {self.hit_ratio}',
+        ]
+
+
+user_cache = UserCache(
+    maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl
+)
+metrics_registry.add_collector(user_cache.render_metrics)
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """JWT-стратегия, которая берёт пользователя из кэша, минуя БД."""
+
+    async def read_token(
+        self,
+        token: Optional[str],
+        user_manager: BaseUserManager[User, int]
+    ) -> Optional[User]:
+        if token is None:
+            return None
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience,
+                algorithms=[self.algorithm]
+            )
+            user_id = user_manager.parse_id(data.get('user_id'))
+        except (jwt.PyJWTError, exceptions.InvalidID):
+            return None
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+        try:
+            user = await user_manager.get(user_id)
+        except exceptions.UserNotExists:
+            return None
+        user_cache.set(user)
+        return user
+
+
 bearer_transport = BearerTransport(tokenUrl='auth/jwt/login')
 
 
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+    return CachedJWTStrategy(secret=settings.secret, lifetime_seconds=3600)
 
 
 auth_backend = AuthenticationBackend(
@@ -55,6 +154,24 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     ):
         print(f'Пользователь {user.email} зарегистрирован.')
 
+    async def on_after_update(
+            self,
+            user: User,
+            update_dict: dict[str, Any],
+            request: Optional[Request] = None,
+    ):
+        user_cache.invalidate(user.id)
+
+    async def on_after_verify(
+            self, user: User, request: Optional[Request] = None
+    ):
+        user_cache.invalidate(user.id)
+
+    async def on_after_reset_password(
+            self, user: User, request: Optional[Request] = None
+    ):
+        user_cache.invalidate(user.id)
+
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
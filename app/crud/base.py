@@ -1,10 +1,12 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Sequence
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select
+from sqlalchemy import Text, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, load_only
 
+from app.constants import BULK_CHUNK_SIZE
 from app.models import User
 
 
@@ -13,34 +15,99 @@ class CRUDBase:
     def __init__(self, model):
         self.model = model
 
+    def projection(self, columns: Optional[Sequence[str]] = None) -> list:
+        """Опции загрузки только нужных колонок модели.
+
+        По умолчанию загружается всё, кроме Text-колонок (описаний,
+        комментариев). Обращение к незагруженной колонке в асинхронной
+        сессии вызывает ошибку, поэтому её нужно явно перечитать.
+        """
+        if columns is not None:
+            return [load_only(
+                *(getattr(self.model, column) for column in columns)
+            )]
+        return [
+            defer(getattr(self.model, column.key))
+            for column in self.model.__table__.columns
+            if isinstance(column.type, Text)
+        ]
+
     async def get(
             self,
             obj_id: int,
             session: AsyncSession,
+            columns: Optional[Sequence[str]] = None,
     ):
-        db_obj = await session.execute(
-            select(self.model).where(
-                self.model.id == obj_id
-            )
-        )
+        db_obj = select(self.model).where(self.model.id == obj_id)
+        if columns is not None:
+            db_obj = db_obj.options(*self.projection(columns))
+        db_obj = await session.execute(db_obj)
         return db_obj.scalars().first()
 
+    def _list_query(
+            self,
+            query,
+            user: Optional[User] = None,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            fully_invested: Optional[bool] = None,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+            user_id: Optional[int] = None,
+    ):
+        """Фильтры и постраничная выборка по ключу `id`.
+
+        `after` - id последнего объекта предыдущей страницы.
+        """
+        if user:
+            user_id = user.id
+        if user_id is not None:
+            query = query.where(self.model.user_id == user_id)
+        if after is not None:
+            query = query.where(self.model.id > after)
+        if fully_invested is not None:
+            query = query.where(self.model.fully_invested == fully_invested)
+        if created_from is not None:
+            query = query.where(self.model.create_date >= created_from)
+        if created_to is not None:
+            query = query.where(self.model.create_date <= created_to)
+        return query.order_by(self.model.id).limit(limit)
+
     async def get_multi(
             self,
             session: AsyncSession,
-            user: Optional[User] = None
+            user: Optional[User] = None,
+            columns: Optional[Sequence[str]] = None,
+            **filters,
     ):
         db_objs = select(self.model)
-        if user:
-            db_objs = db_objs.where(self.model.user_id == user.id)
-        db_objs = await session.execute(db_objs)
+        if columns is not None:
+            db_objs = db_objs.options(*self.projection(columns))
+        db_objs = await session.execute(
+            self._list_query(db_objs, user, **filters)
+        )
         return db_objs.scalars().all()
 
+    async def get_multi_rows(
+            self,
+            session: AsyncSession,
+            columns: list[str],
+            user: Optional[User] = None,
+            **filters,
+    ) -> list[dict]:
+        """Как get_multi, но возвращает словари с указанными колонками."""
+        rows = await session.execute(self._list_query(
+            select(*(getattr(self.model, column) for column in columns)),
+            user, **filters
+        ))
+        return [dict(row) for row in rows.mappings()]
+
     async def create(
             self,
             obj_in,
             session: AsyncSession,
-            user: Optional[User] = None
+            user: Optional[User] = None,
+            commit: bool = True,
     ):
         obj_in_data = obj_in.dict()
         if user:
@@ -48,15 +115,36 @@ class CRUDBase:
         obj_in_data['create_date'] = datetime.utcnow()
         db_obj = self.model(**obj_in_data)
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
-        return db_obj
+        return await self._save(db_obj, session, commit)
+
+    async def bulk_create(
+            self,
+            objs_in: list,
+            session: AsyncSession,
+            user: Optional[User] = None,
+    ) -> int:
+        """Вставляет объекты пачками через executemany без commit."""
+        create_date = datetime.utcnow()
+        objs_in_data = []
+        for obj_in in objs_in:
+            obj_in_data = obj_in.dict()
+            if user and obj_in_data.get('user_id') is None:
+                obj_in_data['user_id'] = user.id
+            obj_in_data['create_date'] = create_date
+            objs_in_data.append(obj_in_data)
+        for start in range(0, len(objs_in_data), BULK_CHUNK_SIZE):
+            await session.execute(
+                insert(self.model),
+                objs_in_data[start:start + BULK_CHUNK_SIZE]
+            )
+        return len(objs_in_data)
 
     async def update(
             self,
             db_obj,
             obj_in,
             session: AsyncSession,
+            commit: bool = True,
     ):
         obj_data = jsonable_encoder(db_obj)
         update_data = obj_in.dict(exclude_unset=True)
@@ -65,15 +153,31 @@ class CRUDBase:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
-        return db_obj
+        return await self._save(db_obj, session, commit)
 
     async def remove(
             self,
             db_obj,
             session: AsyncSession,
+            commit: bool = True,
     ):
         await session.delete(db_obj)
+        if commit:
+            await session.commit()
+        else:
+            await session.flush()
+        return db_obj
+
+    async def _save(
+            self,
+            db_obj,
+            session: AsyncSession,
+            commit: bool,
+    ):
+        """Без commit изменения только отправляются в БД (flush)."""
+        if not commit:
+            await session.flush()
+            return db_obj
         await session.commit()
+        await session.refresh(db_obj)
         return db_obj
@@ -1,39 +1,69 @@
 from typing import Optional
 
-from sqlalchemy import extract, select
+from sqlalchemy import Integer, cast, extract, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.constants import REPORT_PROJECTS_LIMIT
 from app.crud.base import CRUDBase
 from app.models import CharityProject
 
 
 class CRUDCharityProject(CRUDBase):
 
-    async def get_project_id_by_name(
+    async def get_existing_names(
             self,
-            project_name: str,
+            project_names: list[str],
             session: AsyncSession,
-    ) -> Optional[int]:
-        project_id = await session.execute(
-            select(CharityProject.id).where(
-                CharityProject.name == project_name
+    ) -> list[str]:
+        existing_names = await session.execute(
+            select(CharityProject.name).where(
+                CharityProject.name.in_(project_names)
             )
         )
-        project_id = project_id.scalars().first()
-        return project_id
+        return existing_names.scalars().all()
+
+    async def get_by_names(
+            self,
+            project_names: list[str],
+            session: AsyncSession,
+    ) -> list[CharityProject]:
+        projects = await session.execute(
+            select(CharityProject).where(
+                CharityProject.name.in_(project_names)
+            ).order_by(CharityProject.id)
+        )
+        return projects.scalars().all()
+
+    @staticmethod
+    def completion_duration():
+        """Время сбора средств в целых секундах.
+
+        `extract('epoch', ...)` компилируется в EXTRACT(EPOCH FROM ...)
+        для PostgreSQL и в STRFTIME('%s', ...) для SQLite. PostgreSQL 14+
+        возвращает numeric (Decimal в asyncpg), поэтому разность
+        приводится к integer в самом запросе.
+        """
+        return cast(
+            extract('epoch', CharityProject.close_date) -
+            extract('epoch', CharityProject.create_date),
+            Integer
+        )
 
     async def get_projects_by_completion_rate(
-        self, session: AsyncSession
+        self,
+        session: AsyncSession,
+        limit: Optional[int] = REPORT_PROJECTS_LIMIT,
     ) -> Optional[list[str]]:
+        """Самые быстро закрытые проекты, сортировка и отбор - в БД."""
+        duration = self.completion_duration().label('duration')
         closed_projects = await session.execute(
             select(
                 CharityProject.name,
-                (
-                    extract('epoch', CharityProject.close_date) -
-                    extract('epoch', CharityProject.create_date)
-                ).label('duration'),
+                duration,
                 CharityProject.description
-            ).where(CharityProject.fully_invested.is_(True))
+            ).where(
+                CharityProject.fully_invested.is_(True)
+            ).order_by(duration, CharityProject.id).limit(limit)
         )
         closed_projects = closed_projects.all()
         return closed_projects
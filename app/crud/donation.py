@@ -1,9 +1,21 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.crud.base import CRUDBase
-from app.models import Donation
+from app.models import Donation, User
 
 
 class CRUDDonation(CRUDBase):
-    pass
+
+    async def get_existing_user_ids(
+            self,
+            user_ids: list[int],
+            session: AsyncSession,
+    ) -> list[int]:
+        existing_ids = await session.execute(
+            select(User.id).where(User.id.in_(user_ids))
+        )
+        return existing_ids.scalars().all()
 
 
 donation_crud = CRUDDonation(Donation)
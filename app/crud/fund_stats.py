@@ -0,0 +1,72 @@
+from sqlalchemy import false, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models import CharityProject, Donation, FUND_STATS_ID, FundStats
+
+
+class CRUDFundStats(CRUDBase):
+
+    async def get_stats(self, session: AsyncSession) -> FundStats:
+        stats = await session.get(FundStats, FUND_STATS_ID)
+        if stats is None:
+            stats = await self.recalculate(session)
+            await session.commit()
+        return stats
+
+    async def apply_changes(
+            self,
+            session: AsyncSession,
+            total_raised: int = 0,
+            total_invested: int = 0,
+            open_project_count: int = 0,
+    ) -> None:
+        """Изменяет агрегаты одним UPDATE без чтения строки."""
+        if not (total_raised or total_invested or open_project_count):
+            return
+        result = await session.execute(
+            update(FundStats).where(
+                FundStats.id == FUND_STATS_ID
+            ).values(
+                total_raised=FundStats.total_raised + total_raised,
+                total_invested=FundStats.total_invested + total_invested,
+                open_project_count=(
+                    FundStats.open_project_count + open_project_count
+                ),
+                uninvested_balance=(
+                    FundStats.uninvested_balance +
+                    total_raised - total_invested
+                ),
+            ).execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await self.recalculate(session)
+
+    async def recalculate(self, session: AsyncSession) -> FundStats:
+        """Пересчитывает агрегаты по таблицам проектов и пожертвований."""
+        await session.flush()
+        totals = await session.execute(select(
+            select(
+                func.coalesce(func.sum(Donation.full_amount), 0)
+            ).scalar_subquery(),
+            select(
+                func.coalesce(func.sum(Donation.invested_amount), 0)
+            ).scalar_subquery(),
+            select(func.count(CharityProject.id)).where(
+                CharityProject.fully_invested == false()
+            ).scalar_subquery(),
+        ))
+        total_raised, total_invested, open_project_count = totals.one()
+        stats = await session.get(FundStats, FUND_STATS_ID)
+        if stats is None:
+            stats = FundStats(id=FUND_STATS_ID)
+            session.add(stats)
+        stats.total_raised = total_raised
+        stats.total_invested = total_invested
+        stats.open_project_count = open_project_count
+        stats.uninvested_balance = total_raised - total_invested
+        await session.flush()
+        return stats
+
+
+fund_stats_crud = CRUDFundStats(FundStats)
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models import Investment
+
+
+class CRUDInvestment(CRUDBase):
+
+    async def add_many(
+            self,
+            investments: list[dict],
+            session: AsyncSession,
+    ) -> None:
+        """Записывает вложения одним INSERT без commit."""
+        if not investments:
+            return
+        create_date = datetime.utcnow()
+        await session.execute(insert(self.model), [
+            dict(investment, create_date=create_date)
+            for investment in investments
+        ])
+
+    async def get_by_donation(
+            self,
+            donation_id: int,
+            session: AsyncSession,
+    ) -> list[Investment]:
+        investments = await session.execute(
+            select(self.model).where(
+                self.model.donation_id == donation_id
+            ).order_by(self.model.id)
+        )
+        return investments.scalars().all()
+
+
+investment_crud = CRUDInvestment(Investment)
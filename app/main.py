@@ -1,9 +1,39 @@
+import logging
+
 from fastapi import FastAPI
 
 from app.api.routers import main_router
 from app.core.config import settings
+from app.core.db import describe_engine
+from app.core.metrics import MetricsMiddleware, metrics_registry
+from app.services.allocator import start_allocator, stop_allocator
+from app.services.matching import batch_matching_available
+
 
+# uvicorn настраивает только свои логгеры: INFO-записи логгеров пакета
+# app без обработчика отбрасываются.
+logger = logging.getLogger('uvicorn.error')
 
 app = FastAPI(title=settings.app_title)
 
 app.include_router(main_router)
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
+
+@app.on_event('startup')
+async def startup():
+    logger.info(describe_engine())
+    if (
+        settings.allocation_engine == 'numpy' and
+        not batch_matching_available()
+    ):
+        logger.warning(
+            'ALLOCATION_ENGINE=numpy, но NumPy не установлен: средства '
+            'распределяются алгоритмом на Python.'
+        )
+    start_allocator()
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    await stop_allocator()
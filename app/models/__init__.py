@@ -1,4 +1,6 @@
 from .charity_project import CharityProject # noqa
 from .core import CoreClass # noqa
 from .donation import Donation # noqa
+from .fund_stats import FUND_STATS_ID, FundStats # noqa
+from .investment import Investment # noqa
 from .user import User # noqa
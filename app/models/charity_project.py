@@ -5,5 +5,5 @@ from .core import CoreClass
 
 
 class CharityProject(CoreClass):
-    name = Column(String(MAX_STR_FIELD_LENGTH))
+    name = Column(String(MAX_STR_FIELD_LENGTH), unique=True, index=True)
     description = Column(Text)
@@ -1,6 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Boolean, DateTime, Integer
+from sqlalchemy import Column, Boolean, DateTime, Index, Integer
+from sqlalchemy.orm import declared_attr
 
 from app.core.db import Base
 
@@ -14,3 +15,13 @@ class CoreClass(Base):
     fully_invested = Column(Boolean, default=False)
     create_date = Column(DateTime, default=datetime.utcnow)
     close_date = Column(DateTime, nullable=True)
+
+    @declared_attr
+    def __table_args__(cls):
+        """Индекс для выборки открытых объектов в порядке FIFO."""
+        return (
+            Index(
+                f'ix_{cls.__tablename__}_fully_invested_create_date_id',
+                'fully_invested', 'create_date', 'id'
+            ),
+        )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer
+
+from app.core.db import Base
+
+FUND_STATS_ID = 1
+
+
+class FundStats(Base):
+    """Агрегаты фонда по полям CoreClass, хранятся в одной строке."""
+    total_raised = Column(Integer, default=0, nullable=False)
+    total_invested = Column(Integer, default=0, nullable=False)
+    open_project_count = Column(Integer, default=0, nullable=False)
+    uninvested_balance = Column(Integer, default=0, nullable=False)
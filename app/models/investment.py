@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from app.core.db import Base
+
+
+class Investment(Base):
+    """Запись о вложении части пожертвования в проект."""
+    donation_id = Column(
+        Integer, ForeignKey('donation.id'), nullable=False, index=True
+    )
+    project_id = Column(
+        Integer, ForeignKey('charityproject.id'), nullable=False, index=True
+    )
+    amount = Column(Integer, nullable=False)
+    create_date = Column(DateTime, default=datetime.utcnow)
@@ -1,2 +1,4 @@
 from .charity_project import CharityProjectCreate, CharityProjectUpdate # noqa
-from .donation import DonationCreate # noqa
\ No newline at end of file
+from .donation import ( # noqa
+    DonationCreate, DonationImport, DonationImportResult
+)
\ No newline at end of file
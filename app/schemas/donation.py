@@ -11,6 +11,15 @@ class DonationCreate(BaseModel):
     comment: Optional[str]
 
 
+class DonationImport(DonationCreate):
+    user_id: Optional[int]
+
+
+class DonationImportResult(BaseModel):
+    created: int
+    invested_amount: int
+
+
 class UserDonationDB(DonationCreate):
     id: int
     create_date: datetime
@@ -23,3 +32,23 @@ class AllDonationsDB(UserDonationDB):
     user_id: int
     invested_amount: int
     fully_invested: bool
+
+
+class DonationStatusDB(BaseModel):
+    id: int
+    full_amount: int
+    invested_amount: int
+    fully_invested: bool
+    close_date: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class DonationAllocationDB(BaseModel):
+    project_id: int
+    amount: int
+    create_date: datetime
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class FundStatsDB(BaseModel):
+    total_raised: int
+    total_invested: int
+    open_project_count: int
+    uninvested_balance: int
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class SlowQueryDB(BaseModel):
+    statement: str
+    parameters: Any
+    duration: float
+    caller: Optional[str]
+    route: str
+    logged_at: datetime
+    plan: Optional[list[str]]
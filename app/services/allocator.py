@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.services.donation_service import InvestingService
+
+
+logger = logging.getLogger(__name__)
+
+_allocator_task: Optional[asyncio.Task] = None
+
+
+async def run_allocator(session_factory: sessionmaker = AsyncSessionLocal):
+    """Фоновый цикл распределения пожертвований пачками в порядке FIFO."""
+    while True:
+        try:
+            async with session_factory() as session:
+                invested = await InvestingService(session).allocate_pending(
+                    settings.allocation_batch_size
+                )
+        except Exception:
+            # Задача распределителя одна на процесс: любая ошибка только
+            # логируется, иначе пожертвования перестанут распределяться.
+            # CancelledError не наследует Exception и завершает цикл.
+            logger.exception('Ошибка фонового распределения пожертвований')
+            invested = 0
+        if not invested:
+            await asyncio.sleep(settings.allocation_interval)
+
+
+def start_allocator() -> None:
+    global _allocator_task
+    if settings.background_allocation and _allocator_task is None:
+        _allocator_task = asyncio.create_task(run_allocator())
+
+
+async def stop_allocator() -> None:
+    global _allocator_task
+    if _allocator_task is None:
+        return
+    _allocator_task.cancel()
+    try:
+        await _allocator_task
+    except asyncio.CancelledError:
+        pass
+    _allocator_task = None
@@ -1,86 +1,219 @@
+from collections import Counter
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Union
+from typing import Optional, Union
 
 from fastapi import HTTPException, status
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.constants import MIN_INT_FIELD_AMOUNT
-from app.crud import charity_project_crud, donation_crud
+from app.core.config import settings
+from app.crud import (
+    charity_project_crud, donation_crud, fund_stats_crud, investment_crud
+)
 from app.models import CharityProject, Donation, User
 from app.schemas import (
-    CharityProjectCreate, CharityProjectUpdate, DonationCreate
+    CharityProjectCreate, CharityProjectUpdate, DonationCreate,
+    DonationImport, DonationImportResult
+)
+from app.services.google_sheets import report_cache
+from app.services.matching import (
+    SideUpdates, batch_matching_available, match_amounts, match_amounts_batch
+)
+from app.services.project_cache import project_list_cache
+from app.services.utils import (
+    allocation_lock, get_available_donations, get_open_projects,
+    get_open_rests
 )
-from app.services.utils import get_available_donation, get_open_project
 
 
 class InvestingService:
 
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.__projects_closed = False
+        self.__projects_changed = False
+        self.__stats_changes = Counter()
+        self.__investments = []
 
     def __set_money_to_donations_and_projects(
             self,
             donation: Donation,
             project: CharityProject,
+            amount: int,
     ):
-        project_rest = project.full_amount - project.invested_amount
-        donation_rest = donation.full_amount - donation.invested_amount
-        rest = project_rest - donation_rest
-        if rest >= 0:
-            project.invested_amount = (
-                project.invested_amount + donation_rest
-            )
-            donation.invested_amount = donation.full_amount
-            donation.fully_invested = True
-            donation.close_date = datetime.now()
-        else:
-            project.invested_amount = project.full_amount
-            project.fully_invested = True
-            project.close_date = datetime.now()
-            donation.invested_amount = (
-                donation.invested_amount + project_rest
-            )
-        if project.invested_amount == project.full_amount:
-            project.fully_invested = True
-            project.close_date = datetime.now()
-        return project, donation, rest
+        for invested_object in (project, donation):
+            invested_object.invested_amount = (
+                invested_object.invested_amount + amount
+            )
+            if invested_object.invested_amount == invested_object.full_amount:
+                invested_object.fully_invested = True
+                invested_object.close_date = datetime.now()
+        return project, donation, amount
 
     def __distribute_money(
         self,
-        obj_in: Union[Donation, CharityProject],
-        open_project: Union[CharityProject, None],
-        available_donation: Union[Donation, None]
+        donations: list[Donation],
+        projects: list[CharityProject]
+    ):
+        """Распределяет пожертвования по проектам за один проход.
+
+        Оба списка должны быть упорядочены по дате создания (FIFO).
+        """
+        invested_total = 0
+        for donation_index, project_index, amount in match_amounts(
+            [obj.full_amount - obj.invested_amount for obj in donations],
+            [obj.full_amount - obj.invested_amount for obj in projects],
+        ):
+            project, donation, _ = self.__set_money_to_donations_and_projects(
+                donations[donation_index], projects[project_index], amount
+            )
+            invested_total += amount
+            self.__projects_changed = True
+            self.__investments.append(dict(
+                donation_id=donation.id,
+                project_id=project.id,
+                amount=amount,
+            ))
+            if project.fully_invested:
+                self.__projects_closed = True
+                self.__stats_changes['open_project_count'] -= 1
+        self.__stats_changes['total_invested'] += invested_total
+        return invested_total
+
+    async def __apply_side_updates(
+        self,
+        model,
+        ids: list[int],
+        updates: SideUpdates,
     ):
-        rest = 0
-        if isinstance(obj_in, Donation):
-            if open_project:
-                self.__set_money_to_donations_and_projects(
-                    obj_in, open_project
+        """Обновляет суммы и закрытие объектов одним executemany."""
+        if not len(updates.index):
+            return
+        close_date = datetime.now()
+        table = model.__table__
+        await self.session.execute(
+            update(table).where(table.c.id == bindparam('b_id')).values(
+                invested_amount=table.c.invested_amount + bindparam('b_added'),
+                fully_invested=bindparam('b_closed'),
+                close_date=bindparam('b_close_date'),
+            ),
+            [
+                dict(
+                    b_id=ids[index], b_added=added, b_closed=closed,
+                    b_close_date=close_date if closed else None,
                 )
-            if rest < 0:
-                self.__distribute_money(obj_in, open_project, None)
-        elif isinstance(obj_in, CharityProject):
-            if available_donation:
-                self.__set_money_to_donations_and_projects(
-                    available_donation, obj_in
+                for index, added, closed in zip(
+                    updates.index.tolist(), updates.added.tolist(),
+                    updates.closed.tolist()
                 )
-            if rest < 0:
-                self.__distribute_money(obj_in, None, available_donation)
-        return obj_in
+            ]
+        )
 
-    async def __check_name_duplicate(
+    async def __distribute_pending_batch(
         self,
-        project_name: str
-    ):
-        project_id = await charity_project_crud.get_project_id_by_name(
-            project_name, self.session
+        batch_size: Optional[int] = None
+    ) -> int:
+        """Распределение пачки через префиксные суммы без ORM-объектов."""
+        donation_ids, donation_rests = await get_open_rests(
+            self.session, Donation, limit=batch_size
+        )
+        project_ids, project_rests = await get_open_rests(
+            self.session, CharityProject, limit=batch_size
+        )
+        match = match_amounts_batch(donation_rests, project_rests)
+        await self.__apply_side_updates(
+            Donation, donation_ids, match.donations
+        )
+        await self.__apply_side_updates(
+            CharityProject, project_ids, match.projects
         )
-        if project_id is not None:
+        self.__investments.extend(
+            dict(
+                donation_id=donation_ids[donation_index],
+                project_id=project_ids[project_index],
+                amount=amount,
+            )
+            for donation_index, project_index, amount in zip(
+                match.donation_index.tolist(), match.project_index.tolist(),
+                match.amount.tolist()
+            )
+        )
+        invested_total = int(match.amount.sum())
+        closed_projects = int(match.projects.closed.sum())
+        if invested_total:
+            self.__projects_changed = True
+        if closed_projects:
+            self.__projects_closed = True
+        self.__stats_changes['open_project_count'] -= closed_projects
+        self.__stats_changes['total_invested'] += invested_total
+        return invested_total
+
+    async def __distribute_pending(
+        self,
+        batch_size: Optional[int] = None
+    ) -> int:
+        if (
+            settings.allocation_engine == 'numpy' and
+            batch_matching_available()
+        ):
+            return await self.__distribute_pending_batch(batch_size)
+        available_donations = await get_available_donations(
+            self.session, limit=batch_size
+        )
+        open_projects = await get_open_projects(
+            self.session, limit=batch_size
+        )
+        return self.__distribute_money(
+            donations=available_donations, projects=open_projects
+        )
+
+    @asynccontextmanager
+    async def __unique_project_name(self):
+        """Переводит нарушение уникального индекса на имени в ответ 400."""
+        try:
+            yield
+        except IntegrityError:
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Проект с таким именем уже существует!'
+            )
+
+    async def __check_names_duplicate(self, project_names: list[str]):
+        """Проверяет имена пачки одним запросом IN (...)."""
+        if len(set(project_names)) != len(project_names) or (
+            await charity_project_crud.get_existing_names(
+                project_names, self.session
+            )
+        ):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail='Проект с таким именем уже существует!'
             )
 
+    async def __check_users_exist(self, objs_in: list[DonationImport]):
+        """Проверяет владельцев пачки пожертвований одним запросом IN (...)."""
+        user_ids = {
+            obj_in.user_id for obj_in in objs_in if obj_in.user_id is not None
+        }
+        if not user_ids:
+            return
+        unknown_ids = user_ids.difference(
+            await donation_crud.get_existing_user_ids(
+                list(user_ids), self.session
+            )
+        )
+        if unknown_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Пользователи не найдены: user_id ' + ', '.join(
+                    map(str, sorted(unknown_ids))
+                )
+            )
+
     def __check_project_is_invested(self, project: CharityProject):
         if project.invested_amount > MIN_INT_FIELD_AMOUNT:
             raise HTTPException(
@@ -88,12 +221,28 @@ class InvestingService:
                 detail='В проект были внесены средства, не подлежит удалению!'
             )
 
-    async def __add_commit_and_refresh_new_donation_and_project(
+    async def __commit(self):
+        await investment_crud.add_many(self.__investments, self.session)
+        self.__investments.clear()
+        await fund_stats_crud.apply_changes(
+            self.session, **self.__stats_changes
+        )
+        self.__stats_changes.clear()
+        await self.session.commit()
+        if self.__projects_closed:
+            report_cache.invalidate()
+            self.__projects_closed = False
+        if self.__projects_changed:
+            project_list_cache.invalidate()
+            self.__projects_changed = False
+
+    async def __commit_and_refresh(
         self,
         invested_object: Union[CharityProject, Donation]
     ):
+        """Единственный commit операции: фиксирует все изменения сессии."""
         self.session.add(invested_object)
-        await self.session.commit()
+        await self.__commit()
         await self.session.refresh(invested_object)
         return invested_object
 
@@ -116,38 +265,114 @@ class InvestingService:
                 detail='Нелья установить значение full_amount меньше уже вложенной суммы.'
             )
 
+    async def __create_donation(self, obj_in: DonationCreate, user: User):
+        new_object = await donation_crud.create(
+            obj_in, self.session, user, commit=False
+        )
+        self.__stats_changes['total_raised'] += new_object.full_amount
+        return new_object
+
+    async def __create_project(self, obj_in: CharityProjectCreate):
+        new_object = await charity_project_crud.create(
+            obj_in, self.session, commit=False
+        )
+        self.__stats_changes['open_project_count'] += 1
+        self.__projects_changed = True
+        return new_object
+
     async def create_new_donation(
         self,
         obj_in: DonationCreate,
         user: User
     ):
-        new_object = await donation_crud.create(obj_in, self.session, user)
-        open_project = await get_open_project(self.session)
-        invested_donation = self.__distribute_money(
-            obj_in=new_object,
-            open_project=open_project,
-            available_donation=None
-        )
-        return await self.__add_commit_and_refresh_new_donation_and_project(
-            invested_object=invested_donation
-        )
+        if settings.background_allocation:
+            return await self.__commit_and_refresh(
+                invested_object=await self.__create_donation(obj_in, user)
+            )
+        async with allocation_lock(self.session):
+            new_object = await self.__create_donation(obj_in, user)
+            open_projects = await get_open_projects(
+                self.session, amount=new_object.full_amount
+            )
+            self.__distribute_money(
+                donations=[new_object], projects=open_projects
+            )
+            return await self.__commit_and_refresh(
+                invested_object=new_object
+            )
 
     async def create_new_project(
         self,
         obj_in: CharityProjectCreate
     ):
-        await self.__check_name_duplicate(obj_in.name)
-        new_object = await charity_project_crud.create(
-            obj_in, self.session
-        )
-        available_donation = await get_available_donation(self.session)
-        invested_project = self.__distribute_money(
-            obj_in=new_object,
-            open_project=None,
-            available_donation=available_donation
+        if settings.background_allocation:
+            async with self.__unique_project_name():
+                new_object = await self.__create_project(obj_in)
+            return await self.__commit_and_refresh(invested_object=new_object)
+        async with allocation_lock(self.session):
+            async with self.__unique_project_name():
+                new_object = await self.__create_project(obj_in)
+            available_donations = await get_available_donations(
+                self.session, amount=new_object.full_amount
+            )
+            self.__distribute_money(
+                donations=available_donations, projects=[new_object]
+            )
+            return await self.__commit_and_refresh(
+                invested_object=new_object
+            )
+
+    async def create_new_projects(
+        self,
+        objs_in: list[CharityProjectCreate]
+    ) -> list[CharityProject]:
+        """Массовое создание проектов с одним распределением."""
+        project_names = [obj_in.name for obj_in in objs_in]
+        await self.__check_names_duplicate(project_names)
+        async with allocation_lock(self.session):
+            async with self.__unique_project_name():
+                created = await charity_project_crud.bulk_create(
+                    objs_in, self.session
+                )
+            self.__stats_changes['open_project_count'] += created
+            self.__projects_changed = True
+            if not settings.background_allocation:
+                await self.__distribute_pending()
+            await self.__commit()
+        return await charity_project_crud.get_by_names(
+            project_names, self.session
         )
-        return await self.__add_commit_and_refresh_new_donation_and_project(
-            invested_object=invested_project
+
+    async def allocate_pending(self, batch_size: int) -> int:
+        """Распределяет накопившиеся пожертвования по открытым проектам.
+
+        Возвращает распределённую сумму, 0 - если распределять нечего.
+        """
+        async with allocation_lock(self.session):
+            invested_total = await self.__distribute_pending(batch_size)
+            await self.__commit()
+        return invested_total
+
+    async def import_donations(
+        self,
+        objs_in: list[DonationImport],
+        user: User
+    ) -> DonationImportResult:
+        """Массовая загрузка пожертвований с одним распределением."""
+        await self.__check_users_exist(objs_in)
+        async with allocation_lock(self.session):
+            created = await donation_crud.bulk_create(
+                objs_in, self.session, user
+            )
+            self.__stats_changes['total_raised'] += sum(
+                obj_in.full_amount for obj_in in objs_in
+            )
+            invested_total = 0
+            if not settings.background_allocation:
+                invested_total = await self.__distribute_pending()
+            await self.__commit()
+        return DonationImportResult(
+            created=created, invested_amount=invested_total
         )
 
     async def update_project(
@@ -156,17 +381,25 @@ class InvestingService:
         obj_in: CharityProjectUpdate
     ):
         self.__project_validation(project, obj_in)
-        if obj_in.name is not None:
-            await self.__check_name_duplicate(obj_in.name)
-        project = await charity_project_crud.update(
-            project, obj_in, self.session
+        async with self.__unique_project_name():
+            project = await charity_project_crud.update(
+                project, obj_in, self.session, commit=False
+            )
+        self.__projects_changed = True
+        return await self.__commit_and_refresh(
+            invested_object=project
         )
-        return project
 
     async def delete_project(
             self,
             project: CharityProject
     ):
         self.__check_project_is_invested(project)
-        project = await charity_project_crud.remove(project, self.session)
+        if not project.fully_invested:
+            self.__stats_changes['open_project_count'] -= 1
+        project = await charity_project_crud.remove(
+            project, self.session, commit=False
+        )
+        self.__projects_changed = True
+        await self.__commit()
         return project
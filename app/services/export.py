@@ -0,0 +1,57 @@
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    ndjson = 'ndjson'
+    csv = 'csv'
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: 'application/x-ndjson',
+    ExportFormat.csv: 'text/csv',
+}
+
+
+def _rows_to_csv(rows: list[list]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def stream_export(
+    session: AsyncSession,
+    model,
+    schema: type[BaseModel],
+    export_format: ExportFormat,
+) -> AsyncIterator[str]:
+    """Построчно выгружает таблицу с полями схемы ответа API.
+
+    Строки читаются серверным курсором порциями по EXPORT_CHUNK_SIZE,
+    поэтому расход памяти не зависит от размера таблицы.
+    """
+    fields = list(schema.__fields__)
+    result = await session.stream(
+        select(
+            *(getattr(model, field) for field in fields)
+        ).order_by(model.id)
+    )
+    if export_format == ExportFormat.csv:
+        yield _rows_to_csv([fields])
+    async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+        objs = [schema.parse_obj(row._mapping) for row in rows]
+        if export_format == ExportFormat.csv:
+            yield _rows_to_csv(
+                [list(jsonable_encoder(obj).values()) for obj in objs]
+            )
+        else:
+            yield ''.join(f'{obj.json()}\n' for obj in objs)
@@ -0,0 +1,42 @@
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, parse_obj_as
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def fast_json_enabled() -> bool:
+    return settings.fast_json and orjson is not None
+
+
+async def dump_list(
+    session: AsyncSession,
+    crud: CRUDBase,
+    schema: type[BaseModel],
+    **filters,
+) -> Optional[bytes]:
+    """JSON списка объектов в полях схемы ответа, None - если список пуст.
+
+    Быстрый путь выбирает только поля схемы без ORM-объектов и сериализует
+    строки через orjson, минуя валидацию Pydantic и jsonable_encoder.
+    """
+    if fast_json_enabled():
+        rows = await crud.get_multi_rows(
+            session, list(schema.__fields__), **filters
+        )
+        return orjson.dumps(rows) if rows else None
+    db_objs = await crud.get_multi(session, **filters)
+    if not db_objs:
+        return None
+    return JSONResponse(
+        jsonable_encoder(parse_obj_as(list[schema], db_objs))
+    ).body
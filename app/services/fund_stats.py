@@ -0,0 +1,27 @@
+"""Пересчёт агрегатов фонда с нуля.
+
+Запуск из корня проекта: python -m app.services.fund_stats
+"""
+import asyncio
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import AsyncSessionLocal
+from app.crud import fund_stats_crud
+from app.schemas.fund_stats import FundStatsDB
+from app.services.utils import allocation_lock
+
+
+async def reconcile_fund_stats(
+    session_factory: sessionmaker = AsyncSessionLocal
+) -> FundStatsDB:
+    async with session_factory() as session:
+        async with allocation_lock(session):
+            stats = await fund_stats_crud.recalculate(session)
+            stats = FundStatsDB.from_orm(stats)
+            await session.commit()
+    return stats
+
+
+if __name__ == '__main__':
+    print(asyncio.run(reconcile_fund_stats()))
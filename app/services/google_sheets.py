@@ -1,24 +1,118 @@
+import time
 from datetime import datetime, timedelta
 
 from aiogoogle import Aiogoogle
+from aiogoogle.resource import GoogleAPI
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.constants import DATE_FORMAT
 from app.core.config import settings
+from app.crud import charity_project_crud
+
+
+def get_table_size(table_values: list[list]) -> tuple[int, int]:
+    return len(table_values), max(len(row) for row in table_values)
+
+
+def get_column_letter(column_number: int) -> str:
+    """Номер столбца (с единицы) в буквенном обозначении A1."""
+    letters = ''
+    while column_number:
+        column_number, remainder = divmod(column_number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+class ReportCache:
+    """Кэш закрытых проектов для отчёта.
+
+    Сбрасывается при закрытии проекта в этом процессе и устаревает через
+    `ttl` секунд: так в отчёт попадают проекты, закрытые другими
+    процессами. Номер версии не даёт сохранить результат запроса,
+    начатого до сброса.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._version = 0
+        self._closed_projects = None
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._closed_projects = None
+
+    async def get_closed_projects(self, session: AsyncSession) -> list:
+        if (
+            self._closed_projects is not None and
+            time.monotonic() - self._loaded_at < self.ttl
+        ):
+            return self._closed_projects
+        version = self._version
+        loaded_at = time.monotonic()
+        closed_projects = (
+            await charity_project_crud.get_projects_by_completion_rate(
+                session
+            )
+        )
+        if version == self._version:
+            self._closed_projects = closed_projects
+            self._loaded_at = loaded_at
+        return closed_projects
 
 
 class GoogleService:
 
-    async def spreadsheets_create(self, wrapper_services: Aiogoogle) -> str:
+    def __init__(self):
+        self._apis: dict[tuple[str, str], GoogleAPI] = {}
+
+    async def discover(
+        self,
+        wrapper_services: Aiogoogle,
+        api_name: str,
+        api_version: str
+    ) -> GoogleAPI:
+        """Загружает discovery-документ API один раз на процесс."""
+        key = (api_name, api_version)
+        if key not in self._apis:
+            self._apis[key] = await wrapper_services.discover(
+                api_name, api_version
+            )
+        return self._apis[key]
+
+    def make_table_values(self, closed_projects: list) -> list[list]:
+        now_date_time = datetime.now().strftime(DATE_FORMAT)
+        table_values = [
+            ['Отчёт от', now_date_time],
+            ['Топ проектов по скорости закрытия'],
+            ['Название проекта', 'Время сбора', 'Описание']
+        ]
+        for project in closed_projects:
+            new_row = [
+                project.name,
+                str(timedelta(seconds=project.duration)),
+                project.description
+            ]
+            table_values.append(new_row)
+        return table_values
+
+    async def spreadsheets_create(
+            self,
+            table_values: list[list],
+            wrapper_services: Aiogoogle
+    ) -> str:
         now_date_time = datetime.now().strftime(DATE_FORMAT)
-        service = await wrapper_services.discover('sheets', 'v4')
+        service = await self.discover(wrapper_services, 'sheets', 'v4')
+        row_count, column_count = get_table_size(table_values)
         spreadsheet_body = {
             'properties': {'title': f'Отчёт на {now_date_time}',
                            'locale': 'ru_RU'},
             'sheets': [{'properties': {'sheetType': 'GRID',
                                        'sheetId': 0,
                                        'title': 'Лист1',
-                                       'gridProperties': {'rowCount': 100,
-                                                          'columnCount': 11}}}]
+                                       'gridProperties': {
+                                           'rowCount': row_count,
+                                           'columnCount': column_count}}}]
         }
         response = await wrapper_services.as_service_account(
             service.spreadsheets.create(json=spreadsheet_body)
@@ -34,7 +128,7 @@ class GoogleService:
         permissions_body = {'type': 'user',
                             'role': 'writer',
                             'emailAddress': settings.email}
-        service = await wrapper_services.discover('drive', 'v3')
+        service = await self.discover(wrapper_services, 'drive', 'v3')
         await wrapper_services.as_service_account(
             service.permissions.create(
                 fileId=spreadsheetid,
@@ -45,24 +139,11 @@ class GoogleService:
     async def spreadsheets_update_value(
             self,
             spreadsheetid: str,
-            closed_projects: list,
+            table_values: list[list],
             wrapper_services: Aiogoogle
     ) -> None:
-        now_date_time = datetime.now().strftime(DATE_FORMAT)
-        service = await wrapper_services.discover('sheets', 'v4')
-        table_values = [
-            ['Отчёт от', now_date_time],
-            ['Топ проектов по скорости закрытия'],
-            ['Название проекта', 'Время сбора', 'Описание']
-        ]
-        for project in closed_projects:
-            new_row = [
-                project.name,
-                str(timedelta(seconds=project.duration)),
-                project.description
-            ]
-            table_values.append(new_row)
-
+        service = await self.discover(wrapper_services, 'sheets', 'v4')
+        row_count, column_count = get_table_size(table_values)
         update_body = {
             'majorDimension': 'ROWS',
             'values': table_values
@@ -70,7 +151,7 @@ class GoogleService:
         await wrapper_services.as_service_account(
             service.spreadsheets.values.update(
                 spreadsheetId=spreadsheetid,
-                range='A1:E30',
+                range=f'A1:{get_column_letter(column_count)}{row_count}',
                 valueInputOption='USER_ENTERED',
                 json=update_body
             )
@@ -78,3 +159,4 @@ class GoogleService:
 
 
 google_service = GoogleService()
+report_cache = ReportCache(ttl=settings.report_cache_ttl)
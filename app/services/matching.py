@@ -0,0 +1,91 @@
+from typing import Iterator, NamedTuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Transfer = tuple[int, int, int]
+
+
+def match_amounts(
+    donation_rests: Sequence[int],
+    project_rests: Sequence[int],
+) -> Iterator[Transfer]:
+    """Сопоставляет остатки пожертвований и проектов в порядке FIFO.
+
+    Оба списка должны быть упорядочены по дате создания. Выдаёт переводы
+    `(индекс пожертвования, индекс проекта, сумма)` по одному, не
+    накапливая их в памяти.
+    """
+    projects = iter(enumerate(project_rests))
+    project_index, project_rest = next(projects, (None, 0))
+    for donation_index, donation_rest in enumerate(donation_rests):
+        while project_index is not None and donation_rest > 0:
+            amount = min(donation_rest, project_rest)
+            if amount:
+                yield donation_index, project_index, amount
+            donation_rest -= amount
+            project_rest -= amount
+            if project_rest == 0:
+                project_index, project_rest = next(projects, (None, 0))
+        if project_index is None:
+            break
+
+
+class SideUpdates(NamedTuple):
+    """Изменения одной стороны: индексы, добавленные суммы, закрытие."""
+    index: 'np.ndarray'
+    added: 'np.ndarray'
+    closed: 'np.ndarray'
+
+
+class BatchMatch(NamedTuple):
+    donation_index: 'np.ndarray'
+    project_index: 'np.ndarray'
+    amount: 'np.ndarray'
+    donations: SideUpdates
+    projects: SideUpdates
+
+
+def _side_updates(ends: 'np.ndarray', rests: 'np.ndarray', total: int):
+    added = np.minimum(ends, total) - np.minimum(ends - rests, total)
+    index = np.flatnonzero(added)
+    return SideUpdates(index, added[index], ends[index] <= total)
+
+
+def match_amounts_batch(
+    donation_rests: Sequence[int],
+    project_rests: Sequence[int],
+) -> BatchMatch:
+    """То же, что match_amounts, но для всей пачки сразу через NumPy.
+
+    Пожертвования и проекты - два потока денег, а их префиксные суммы -
+    границы объектов на общей оси. Каждая граница до меньшей из двух сумм
+    закрывает перевод, а searchsorted находит, чьи это объекты.
+    """
+    donation_rests = np.asarray(donation_rests, dtype=np.int64)
+    project_rests = np.asarray(project_rests, dtype=np.int64)
+    donation_ends = np.cumsum(donation_rests)
+    project_ends = np.cumsum(project_rests)
+    total = 0
+    if len(donation_ends) and len(project_ends):
+        total = min(donation_ends[-1], project_ends[-1])
+    # Обе последовательности уже отсортированы: stable-сортировка сливает
+    # их за линейное время, а diff отбрасывает повторы и нули.
+    points = np.sort(np.concatenate((
+        donation_ends[donation_ends <= total],
+        project_ends[project_ends <= total]
+    )), kind='stable')
+    points = points[np.diff(points, prepend=0) > 0]
+    return BatchMatch(
+        donation_index=np.searchsorted(donation_ends, points),
+        project_index=np.searchsorted(project_ends, points),
+        amount=np.diff(points, prepend=0),
+        donations=_side_updates(donation_ends, donation_rests, total),
+        projects=_side_updates(project_ends, project_rests, total),
+    )
+
+
+def batch_matching_available() -> bool:
+    return np is not None
@@ -0,0 +1,79 @@
+import hashlib
+import time
+from typing import Awaitable, Callable, Hashable, Optional
+from uuid import uuid4
+
+from cachetools import LRUCache
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+
+
+class ProjectListCache:
+    """Кэш сериализованных страниц списка проектов.
+
+    Сбрасывается при любом изменении проектов в этом процессе и не реже
+    раза в `ttl` секунд: изменения из других процессов видны с этой
+    задержкой. ETag строится из номера версии, поэтому ответ 304 не
+    требует обращения к БД.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._instance = uuid4().hex[:8]
+        self._version = 0
+        self._started = time.monotonic()
+        self._payloads = LRUCache(maxsize=maxsize)
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._started = time.monotonic()
+        self._payloads.clear()
+
+    def _expire(self) -> None:
+        if time.monotonic() - self._started >= self.ttl:
+            self.invalidate()
+
+    def etag(self, key: Hashable, version: Optional[int] = None) -> str:
+        if version is None:
+            version = self._version
+        digest = hashlib.md5(repr(key).encode()).hexdigest()[:16]
+        return f'"{self._instance}-{version}-{digest}"'
+
+    async def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        load: Callable[[], Awaitable[bytes]],
+    ) -> Response:
+        """Отдаёт 304, страницу из кэша или загружает её через `load`."""
+        self._expire()
+        etag = self.etag(key)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={'ETag': etag}
+            )
+        body = self._payloads.get(key)
+        if body is None:
+            version = self._version
+            body = await load()
+            if version == self._version:
+                self._payloads[key] = body
+            etag = self.etag(key, version)
+        return Response(
+            content=body, media_type='application/json', headers={'ETag': etag}
+        )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags
+
+
+project_list_cache = ProjectListCache(
+    maxsize=settings.project_list_cache_size,
+    ttl=settings.project_list_cache_ttl,
+)
@@ -1,22 +1,140 @@
-from sqlalchemy import select
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import false, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud import charity_project_crud, donation_crud
 from app.models import CharityProject, Donation
 
+OPEN_OBJECTS_CHUNK_SIZE = 20
+
+_allocation_locks = WeakKeyDictionary()
+
+
+def supports_skip_locked(session: AsyncSession) -> bool:
+    return session.bind.dialect.name == 'postgresql'
+
 
-async def get_open_project(session: AsyncSession):
-    open_project = await session.execute(
-        select(CharityProject).where(CharityProject.fully_invested.is_(False))
+@asynccontextmanager
+async def allocation_lock(session: AsyncSession):
+    """Защищает распределение средств от параллельных запросов.
+
+    В PostgreSQL открытые объекты блокируются построчно: распределение
+    пачки пропускает занятые строки (FOR UPDATE SKIP LOCKED), а новый
+    объект ждёт блокировки только тех объектов, которые ему нужны. Для
+    остальных СУБД распределение выполняется последовательно в пределах
+    процесса, а в SQLite транзакция начинается с BEGIN IMMEDIATE: между
+    процессами запись сериализует сама БД, и параллельная транзакция
+    ждёт busy_timeout вместо ошибки SQLITE_BUSY при чтении-записи.
+    """
+    if supports_skip_locked(session):
+        yield
+        return
+    lock = _allocation_locks.setdefault(
+        asyncio.get_running_loop(), asyncio.Lock()
     )
-    open_project = open_project.scalars().first()
-    return open_project
+    async with lock:
+        if session.bind.dialect.name == 'sqlite':
+            await _begin_immediate(session)
+        yield
+
 
+async def _begin_immediate(session: AsyncSession) -> None:
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    if not raw_connection.driver_connection.in_transaction:
+        await connection.exec_driver_sql('BEGIN IMMEDIATE')
 
-async def get_available_donation(
-    session: AsyncSession
+
+def _lock_open_objects(
+    query,
+    session: AsyncSession,
+    skip_locked: bool = True
 ):
-    available_donation = await session.execute(
-        select(Donation).where(Donation.fully_invested.is_(False))
+    if supports_skip_locked(session):
+        return query.with_for_update(skip_locked=skip_locked)
+    return query
+
+
+async def _get_open_objects(
+    session: AsyncSession,
+    model,
+    projection: list,
+    limit: Optional[int] = None,
+    amount: Optional[int] = None,
+) -> list:
+    """Открытые объекты в порядке FIFO.
+
+    Без `amount` выбирает до `limit` объектов, пропуская заблокированные
+    другими транзакциями. С `amount` выбирает объекты порциями, пока их
+    остатков не хватит на сумму, и ждёт освобождения занятых строк:
+    блокируются только нужные объекты, а параллельный запрос не
+    остаётся без проектов из-за того, что их все заняла одна транзакция.
+    """
+    query = select(model).options(*projection).where(
+        model.fully_invested == false()
+    ).order_by(model.create_date, model.id)
+    if amount is None:
+        open_objects = await session.execute(
+            _lock_open_objects(query.limit(limit), session)
+        )
+        return open_objects.scalars().all()
+    open_objects = []
+    while amount > 0:
+        chunk_query = query
+        if open_objects:
+            last = open_objects[-1]
+            chunk_query = query.where(
+                tuple_(model.create_date, model.id) >
+                tuple_(last.create_date, last.id)
+            )
+        chunk = await session.execute(_lock_open_objects(
+            chunk_query.limit(OPEN_OBJECTS_CHUNK_SIZE), session,
+            skip_locked=False
+        ))
+        chunk = chunk.scalars().all()
+        if not chunk:
+            break
+        open_objects += chunk
+        amount -= sum(obj.full_amount - obj.invested_amount for obj in chunk)
+    return open_objects
+
+
+async def get_open_projects(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    amount: Optional[int] = None,
+) -> list[CharityProject]:
+    return await _get_open_objects(
+        session, CharityProject, charity_project_crud.projection(),
+        limit, amount
     )
-    available_donation = available_donation.scalars().first()
-    return available_donation
+
+
+async def get_available_donations(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    amount: Optional[int] = None,
+) -> list[Donation]:
+    return await _get_open_objects(
+        session, Donation, donation_crud.projection(), limit, amount
+    )
+
+
+async def get_open_rests(
+    session: AsyncSession,
+    model,
+    limit: Optional[int] = None
+) -> tuple[list[int], list[int]]:
+    """id и нераспределённые остатки открытых объектов без ORM-объектов."""
+    rests = await session.execute(_lock_open_objects(
+        select(model.id, model.full_amount - model.invested_amount).where(
+            model.fully_invested == false()
+        ).order_by(model.create_date, model.id).limit(limit),
+        session
+    ))
+    rests = rests.all()
+    return [row[0] for row in rests], [row[1] for row in rests]
@@ -0,0 +1,143 @@
+"""Микробенчмарк алгоритма распределения средств.
+
+Прогоняет чистую функцию `match_amounts` на 10^3 - 10^7 открытых
+пожертвований и проектов, замеряя время и пиковую память, и проверяет,
+что её переводы совпадают с распределением через InvestingService и ORM.
+Если установлен NumPy, замеряет и `match_amounts_batch`.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.allocation --sizes 1000 100000 10000000
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from array import array
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.models import CharityProject, Donation, Investment
+from app.services.donation_service import InvestingService
+from app.services.matching import (
+    batch_matching_available, match_amounts, match_amounts_batch
+)
+
+DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+
+
+def make_rests(rng: random.Random, size: int, scale: int) -> array:
+    return array('q', (
+        max(1, int(rng.paretovariate(1.5) * scale)) for _ in range(size)
+    ))
+
+
+def measure(size: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    donation_rests = make_rests(rng, size, 1000)
+    project_rests = make_rests(rng, size, 10000)
+    started = time.perf_counter()
+    deque(match_amounts(donation_rests, project_rests), maxlen=0)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    transfers = sum(1 for _ in match_amounts(donation_rests, project_rests))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        'open_items': size,
+        'transfers': transfers,
+        'time_ms': elapsed * 1000,
+        'transfers_per_second': int(transfers / elapsed),
+        'peak_memory_kb': peak / 1024,
+    }
+    if batch_matching_available():
+        started = time.perf_counter()
+        match_amounts_batch(donation_rests, project_rests)
+        result['numpy_time_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+async def matches_orm(size: int, seed: int) -> bool:
+    """Сравнивает переводы с журналом вложений после InvestingService."""
+    rng = random.Random(seed)
+    donation_rests = make_rests(rng, size, 1000)
+    project_rests = make_rests(rng, size, 10000)
+    expected = [
+        (donation_index + 1, project_index + 1, amount)
+        for donation_index, project_index, amount in match_amounts(
+            donation_rests, project_rests
+        )
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(directory) / "bench.db"}'
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession)
+        start_date = datetime(2020, 1, 1)
+        async with session_factory() as session:
+            await session.execute(insert(CharityProject), [
+                dict(
+                    name=f'project {number}',
+                    description='description',
+                    full_amount=rest,
+                    invested_amount=0,
+                    fully_invested=False,
+                    create_date=start_date + timedelta(seconds=number),
+                ) for number, rest in enumerate(project_rests)
+            ])
+            await session.execute(insert(Donation), [
+                dict(
+                    full_amount=rest,
+                    invested_amount=0,
+                    fully_invested=False,
+                    create_date=start_date + timedelta(seconds=number),
+                ) for number, rest in enumerate(donation_rests)
+            ])
+            await session.commit()
+            await InvestingService(session).allocate_pending(size)
+            investments = await session.execute(
+                select(
+                    Investment.donation_id,
+                    Investment.project_id,
+                    Investment.amount,
+                ).order_by(Investment.id)
+            )
+            actual = [tuple(row) for row in investments]
+        await engine.dispose()
+    return actual == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=DEFAULT_SIZES
+    )
+    parser.add_argument(
+        '--check-size', type=int, default=1000,
+        help='размер проверки против InvestingService, 0 - без проверки'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    result = {
+        'results': [measure(size, args.seed) for size in args.sizes],
+    }
+    if args.check_size:
+        result['matches_orm'] = asyncio.run(
+            matches_orm(args.check_size, args.seed)
+        )
+    print(json.dumps(result, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Бенчмарк сериализации списка проектов.
+
+Сравнивает пропускную способность выдачи `GET /charity_project/`:
+ORM-объекты со схемой ответа Pydantic и jsonable_encoder против выборки
+нужных колонок и сериализации через orjson.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.list_serialization --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import Base
+from app.crud import charity_project_crud
+from app.models import CharityProject
+from app.schemas.charity_project import GetCharityProjectDB
+from app.services.fast_json import dump_list
+
+CHUNK_SIZE = 10000
+
+
+async def seed(session: AsyncSession, rows: int) -> None:
+    start_date = datetime(2020, 1, 1)
+    for offset in range(0, rows, CHUNK_SIZE):
+        await session.execute(insert(CharityProject), [
+            dict(
+                name=f'project {number}',
+                description='description ' * 10,
+                full_amount=1000,
+                invested_amount=number % 1000,
+                fully_invested=False,
+                create_date=start_date + timedelta(minutes=number),
+            ) for number in range(offset, min(offset + CHUNK_SIZE, rows))
+        ])
+    await session.commit()
+
+
+async def measure(session: AsyncSession, rows: int, repeat: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = await dump_list(
+            session, charity_project_crud, GetCharityProjectDB, limit=rows
+        )
+        session.expunge_all()
+    elapsed = (time.perf_counter() - started) / repeat
+    return {
+        'latency_ms': elapsed * 1000,
+        'rows_per_second': int(rows / elapsed),
+        'body_bytes': len(body),
+    }
+
+
+async def run(rows: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(directory) / "bench.db"}'
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession)
+        async with session_factory() as session:
+            await seed(session, rows)
+            settings.fast_json = False
+            pydantic = await measure(session, rows, repeat)
+            settings.fast_json = True
+            orjson = await measure(session, rows, repeat)
+        await engine.dispose()
+    return {
+        'rows': rows,
+        'pydantic': pydantic,
+        'orjson': orjson,
+        'speedup': pydantic['latency_ms'] / orjson['latency_ms'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.rows, args.repeat))
+    print(json.dumps(result, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
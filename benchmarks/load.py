@@ -0,0 +1,260 @@
+"""Нагрузочный бенчмарк записи и чтения проектов и пожертвований.
+
+Заполняет временную SQLite-базу проектами и пожертвованиями с
+неравномерными суммами и гоняет приложение в том же процессе через
+httpx из множества параллельных задач. Для каждого сценария выводит в
+JSON задержки p50/p95/p99, запросы в секунду и число SQL-запросов на
+запрос, чтобы сравнивать результаты между коммитами.
+
+Сценарий `list` читает разные страницы при выключенном кэше списка
+проектов и измеряет выборку из БД, `list_cached` - повторный запрос
+одной страницы из кэша.
+
+Авторизация подменяется зависимостями, как в тестах: измеряются пути
+записи, а не проверка токена.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.load --projects 10000 --donations 50000 \\
+        --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import (
+    Base, RequestSession, get_async_session, get_engine_options,
+    instrument_engine, set_sqlite_pragmas
+)
+from app.core.metrics import metrics_registry
+from app.core.user import current_superuser, current_user
+from app.crud import fund_stats_crud
+from app.main import app
+from app.models import CharityProject, Donation, User
+from app.services.project_cache import project_list_cache
+
+CHUNK_SIZE = 10000
+SCENARIOS = ('donation', 'project', 'list', 'list_cached')
+ROUTES = {
+    'donation': ('POST', '/donation/'),
+    'project': ('POST', '/charity_project/'),
+    'list': ('GET', '/charity_project/'),
+    'list_cached': ('GET', '/charity_project/'),
+}
+PAGE_SIZE = 100
+
+
+def skewed_amount(rng: random.Random, scale: int) -> int:
+    """Сумма с тяжёлым хвостом: много мелких и редкие крупные."""
+    return max(1, int(rng.paretovariate(1.5) * scale))
+
+
+async def seed(
+    session: AsyncSession,
+    rng: random.Random,
+    projects: int,
+    donations: int,
+    open_share: float,
+) -> User:
+    user = User(email='bench@fund.ru', hashed_password='-', is_superuser=True)
+    session.add(user)
+    await session.flush()
+    user_id = user.id
+    start_date = datetime(2020, 1, 1)
+    for model, rows, scale in (
+        (CharityProject, projects, 10000),
+        (Donation, donations, 1000),
+    ):
+        for offset in range(0, rows, CHUNK_SIZE):
+            chunk = []
+            for number in range(offset, min(offset + CHUNK_SIZE, rows)):
+                full_amount = skewed_amount(rng, scale)
+                is_open = (
+                    model is CharityProject and
+                    number >= rows * (1 - open_share)
+                )
+                row = dict(
+                    full_amount=full_amount,
+                    invested_amount=0 if is_open else full_amount,
+                    fully_invested=not is_open,
+                    create_date=start_date + timedelta(seconds=number),
+                )
+                if model is CharityProject:
+                    row.update(
+                        name=f'seed project {number}',
+                        description='description ' * rng.randint(1, 50),
+                    )
+                else:
+                    row.update(user_id=user_id, comment='comment')
+                chunk.append(row)
+            await session.execute(insert(model), chunk)
+    await fund_stats_crud.recalculate(session)
+    await session.commit()
+    return User(
+        id=user_id, is_active=True, is_verified=True, is_superuser=True
+    )
+
+
+def make_request(
+    scenario: str,
+    rng: random.Random,
+    number: int,
+    projects: int,
+):
+    method, url = ROUTES[scenario]
+    if scenario == 'donation':
+        return method, url, dict(json={
+            'full_amount': skewed_amount(rng, 1000)
+        })
+    if scenario == 'project':
+        return method, url, dict(json={
+            'name': f'bench project {number}',
+            'description': 'Load testing',
+            'full_amount': skewed_amount(rng, 10000),
+        })
+    if scenario == 'list':
+        return method, url, dict(params={
+            'limit': PAGE_SIZE, 'after': rng.randrange(max(projects, 1))
+        })
+    return method, url, dict(params={'limit': PAGE_SIZE})
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: str,
+    requests: int,
+    concurrency: int,
+    rng: random.Random,
+    projects: int,
+) -> dict:
+    metrics_registry.clear()
+    project_list_cache.invalidate()
+    # Нулевой TTL сбрасывает кэш списка перед каждым запросом.
+    project_list_cache.ttl = 0 if scenario == 'list' else (
+        settings.project_list_cache_ttl
+    )
+    queue = asyncio.Queue()
+    for number in range(requests):
+        queue.put_nowait(make_request(scenario, rng, number, projects))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            method, url, kwargs = queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    percentiles = statistics.quantiles(latencies, n=100)
+    statements = metrics_registry.statements[ROUTES[scenario]]
+    return {
+        'requests': requests,
+        'errors': errors,
+        'requests_per_second': requests / elapsed,
+        'latency_ms': {
+            'p50': percentiles[49] * 1000,
+            'p95': percentiles[94] * 1000,
+            'p99': percentiles[98] * 1000,
+        },
+        'sql_statements_per_request': statements.sum / statements.count,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        url = f'sqlite+aiosqlite:///{Path(directory) / "bench.db"}'
+        engine = create_async_engine(url, **get_engine_options(url))
+        event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+        instrument_engine(engine.sync_engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(
+            engine, class_=AsyncSession, sync_session_class=RequestSession
+        )
+        async with session_factory() as session:
+            user = await seed(
+                session, rng, args.projects, args.donations, args.open_share
+            )
+
+        async def override_session():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides = {
+            get_async_session: override_session,
+            current_user: lambda: user,
+            current_superuser: lambda: user,
+        }
+        settings.metrics_enabled = True
+        results = {}
+        async with httpx.AsyncClient(
+            app=app, base_url='http://bench'
+        ) as client:
+            for scenario in args.scenarios:
+                results[scenario] = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, rng,
+                    args.projects
+                )
+        project_list_cache.ttl = settings.project_list_cache_ttl
+        app.dependency_overrides = {}
+        await engine.dispose()
+    return {
+        'revision': git_revision(),
+        'projects': args.projects,
+        'donations': args.donations,
+        'open_share': args.open_share,
+        'concurrency': args.concurrency,
+        'scenarios': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', type=int, default=10000)
+    parser.add_argument('--donations', type=int, default=50000)
+    parser.add_argument(
+        '--open-share', type=float, default=0.05,
+        help='доля открытых проектов, пожертвования распределены'
+    )
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
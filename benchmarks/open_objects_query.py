@@ -0,0 +1,128 @@
+"""Бенчмарк выборки открытых проектов и пожертвований.
+
+Сравнивает план и время выполнения запроса до и после добавления
+индексов `(fully_invested, create_date, id)` на таблице с большим
+количеством закрытых записей.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.open_objects_query --rows 1000000 --open 100
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import false, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.models import CharityProject
+from app.services.utils import get_open_projects
+
+CHUNK_SIZE = 10000
+INDEX_NAME = 'ix_charityproject_fully_invested_create_date_id'
+
+
+def legacy_query():
+    """Запрос в том виде, в котором он был до добавления индексов."""
+    return select(CharityProject).where(
+        CharityProject.fully_invested.is_(False)
+    )
+
+
+async def seed(session: AsyncSession, rows: int, open_rows: int) -> None:
+    start_date = datetime(2020, 1, 1)
+    for offset in range(0, rows, CHUNK_SIZE):
+        chunk = []
+        for number in range(offset, min(offset + CHUNK_SIZE, rows)):
+            is_open = number >= rows - open_rows
+            chunk.append(dict(
+                name=f'project {number}',
+                description='description',
+                full_amount=1000,
+                invested_amount=0 if is_open else 1000,
+                fully_invested=not is_open,
+                create_date=start_date + timedelta(minutes=number),
+            ))
+        await session.execute(insert(CharityProject), chunk)
+    await session.commit()
+
+
+async def explain(session: AsyncSession, query) -> list[str]:
+    compiled = query.compile(
+        dialect=session.bind.dialect,
+        compile_kwargs={'literal_binds': True}
+    )
+    plan = await session.execute(text(f'EXPLAIN QUERY PLAN {compiled}'))
+    return [row[-1] for row in plan.all()]
+
+
+async def measure(coroutine_factory, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await coroutine_factory()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def run(rows: int, open_rows: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(directory) / "bench.db"}'
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession)
+        async with session_factory() as session:
+            await seed(session, rows, open_rows)
+
+            async def legacy():
+                result = await session.execute(legacy_query())
+                result.scalars().first()
+                session.expunge_all()
+
+            async def indexed():
+                await get_open_projects(session)
+                session.expunge_all()
+
+            await session.execute(text(f'DROP INDEX {INDEX_NAME}'))
+            before = {
+                'plan': await explain(session, legacy_query()),
+                'latency_ms': await measure(legacy, repeat),
+            }
+            await session.execute(text(
+                f'CREATE INDEX {INDEX_NAME} ON charityproject '
+                '(fully_invested, create_date, id)'
+            ))
+            query = select(CharityProject).where(
+                CharityProject.fully_invested == false()
+            ).order_by(CharityProject.create_date, CharityProject.id)
+            after = {
+                'plan': await explain(session, query),
+                'latency_ms': await measure(indexed, repeat),
+            }
+        await engine.dispose()
+    return {
+        'rows': rows,
+        'open_rows': open_rows,
+        'before': before,
+        'after': after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--open', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.rows, args.open, args.repeat))
+    print(json.dumps(result, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
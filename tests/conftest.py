@@ -1,9 +1,10 @@
+from contextlib import contextmanager
 from pathlib import Path
 
 import pytest
 import pytest_asyncio
 from mixer.backend.sqlalchemy import Mixer as _mixer
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -16,16 +17,16 @@ except (NameError, ImportError) as error:
     )
 
 try:
-    from app.core.db import Base, get_async_session  # noqa
+    from app.core.db import Base, RequestSession, get_async_session  # noqa
 except (NameError, ImportError) as error:
     raise AssertionError(
-        'При импорте объектов `Base, get_async_session` '
+        'При импорте объектов `Base, RequestSession, get_async_session` '
         'из модуля `app.core.db` возникло исключение:\n'
         f'{type(error).__name__}: {error}.'
     )
 
 try:
-    from app.core.user import current_superuser, current_user  # noqa
+    from app.core.user import current_superuser, current_user, user_cache  # noqa
 except (NameError, ImportError) as error:
     raise AssertionError(
         'При импорте объектов `current_superuser, current_user` '
@@ -33,6 +34,24 @@ except (NameError, ImportError) as error:
         f'{type(error).__name__}: {error}.'
     )
 
+try:
+    from app.services.google_sheets import report_cache  # noqa
+except (NameError, ImportError) as error:
+    raise AssertionError(
+        'При импорте объекта `report_cache` из модуля '
+        '`app.services.google_sheets` возникло исключение:\n'
+        f'{type(error).__name__}: {error}.'
+    )
+
+try:
+    from app.services.project_cache import project_list_cache  # noqa
+except (NameError, ImportError) as error:
+    raise AssertionError(
+        'При импорте объекта `project_list_cache` из модуля '
+        '`app.services.project_cache` возникло исключение:\n'
+        f'{type(error).__name__}: {error}.'
+    )
+
 try:
     from app.schemas.user import UserCreate  # noqa
 except (NameError, ImportError) as error:
@@ -58,6 +77,7 @@ engine = create_async_engine(
 )
 TestingSessionLocal = sessionmaker(
     class_=AsyncSession, autocommit=False, autoflush=False, bind=engine,
+    sync_session_class=RequestSession,
 )
 
 
@@ -75,6 +95,41 @@ async def init_db():
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    report_cache.invalidate()
+    user_cache.clear()
+    project_list_cache.invalidate()
+    yield
+
+
+@pytest.fixture
+def sql_statements():
+    """Контекстный менеджер, собирающий SQL-запросы к тестовой БД.
+
+    Необязательный фильтр отбирает запросы по их тексту.
+    """
+    @contextmanager
+    def capture(statement_filter=None):
+        statements = []
+
+        def collect_statement(conn, cursor, statement, *args):
+            if statement_filter is None or statement_filter(statement):
+                statements.append(statement)
+
+        event.listen(
+            engine.sync_engine, 'before_cursor_execute', collect_statement
+        )
+        try:
+            yield statements
+        finally:
+            event.remove(
+                engine.sync_engine, 'before_cursor_execute', collect_statement
+            )
+
+    return capture
+
+
 @pytest.fixture
 def mixer():
     mixer_engine = create_engine(f'sqlite:///{str(TEST_DB)}')
@@ -21,6 +21,9 @@ user = User(
     is_superuser=False,
 )
 
+JWT_USER_EMAIL = 'cat@fund.ru'
+JWT_USER_PASSWORD = 'meow-meow'
+
 not_auth_user = User(
     id=3,
     is_active=False,
@@ -60,3 +63,21 @@ def superuser_client():
     app.dependency_overrides[current_superuser] = lambda: superuser
     with TestClient(app) as client:
         yield client
+
+
+@pytest.fixture
+def jwt_client():
+    """Клиент с настоящим JWT-токеном, без подмены `current_user`."""
+    app.dependency_overrides = {}
+    app.dependency_overrides[get_async_session] = override_db
+    with TestClient(app) as client:
+        credentials = {
+            'email': JWT_USER_EMAIL, 'password': JWT_USER_PASSWORD
+        }
+        client.post('/auth/register', json=credentials)
+        response = client.post('/auth/jwt/login', data={
+            'username': JWT_USER_EMAIL, 'password': JWT_USER_PASSWORD
+        })
+        token = response.json()['access_token']
+        client.headers['Authorization'] = f'Bearer {token}'
+        yield client
@@ -1,7 +1,11 @@
+import json
 import time
 from datetime import datetime
 
 import pytest
+from conftest import project_list_cache
+
+from app.core.config import settings
 
 PROJECTS_URL = '/charity_project/'
 PROJECT_DETAILS_URL = PROJECTS_URL + '{project_id}'
@@ -728,3 +732,206 @@ def test_get_all_charity_project_not_auth_user(test_client):
         f'пользователя к эндпоинту `{PROJECTS_URL}` возвращается список '
         'существующих проектов.'
     )
+
+
+@pytest.mark.usefixtures('charity_project')
+def test_get_all_charity_projects_empty_filter(user_client):
+    response = user_client.get(PROJECTS_URL, params={'fully_invested': True})
+    assert response.status_code == 200 and response.json() == [], (
+        'Если под фильтр не попал ни один проект, должен возвращаться '
+        'пустой список, а не ошибка 404.'
+    )
+
+
+@pytest.mark.usefixtures(
+    'charity_project', 'charity_project_nunchaku', 'small_fully_charity_project'
+)
+def test_get_all_charity_project_pagination(user_client):
+    response = user_client.get(PROJECTS_URL, params={'limit': 2})
+    assert response.status_code == 200, (
+        f'GET-запрос с параметром `limit` к эндпоинту `{PROJECTS_URL}` '
+        'должен вернуть ответ со статус-кодом 200.'
+    )
+    first_page = response.json()
+    assert [project['id'] for project in first_page] == [1, 2], (
+        'Параметр `limit` должен ограничивать количество проектов в ответе, '
+        'проекты должны быть упорядочены по `id`.'
+    )
+    second_page = user_client.get(
+        PROJECTS_URL, params={'limit': 2, 'after': first_page[-1]['id']}
+    ).json()
+    assert [project['id'] for project in second_page] == [3], (
+        'Параметр `after` должен возвращать проекты, следующие за '
+        'указанным `id`.'
+    )
+    response = user_client.get(
+        PROJECTS_URL, params={'limit': 2, 'after': second_page[-1]['id']}
+    )
+    assert response.status_code == 200 and response.json() == [], (
+        'Страница после последней должна возвращать пустой список, '
+        'а не ошибку 404.'
+    )
+    closed = user_client.get(
+        PROJECTS_URL, params={'fully_invested': True}
+    ).json()
+    assert [project['name'] for project in closed] == ['1M$ for ur project'], (
+        'Параметр `fully_invested` должен фильтровать проекты по статусу.'
+    )
+    response = user_client.get(PROJECTS_URL, params={'limit': 0})
+    assert response.status_code == 422, (
+        'Значение `limit` меньше единицы должно быть запрещено.'
+    )
+
+
+@pytest.mark.usefixtures('charity_project', 'small_fully_charity_project')
+def test_export_charity_projects(superuser_client):
+    export_url = PROJECTS_URL + 'export'
+    response = superuser_client.get(export_url)
+    assert response.status_code == 200, (
+        f'GET-запрос суперпользователя к эндпоинту `{export_url}` '
+        'должен вернуть ответ со статус-кодом 200.'
+    )
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [project['name'] for project in exported] == [
+        'chimichangas4life', '1M$ for ur project'
+    ], 'Выгрузка должна содержать все проекты в порядке `id`.'
+    assert exported[1]['close_date'] == '2010-10-11T00:00:00', (
+        'Выгрузка проектов должна содержать поля схемы `CharityProjectDB`.'
+    )
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_create_charity_projects_bulk(superuser_client):
+    bulk_url = PROJECTS_URL + 'bulk'
+    response = superuser_client.post(bulk_url, json=[
+        {'name': 'first', 'description': 'First', 'full_amount': 1500},
+        {'name': 'second', 'description': 'Second', 'full_amount': 1000},
+    ])
+    assert response.status_code == 200, (
+        f'POST-запрос суперпользователя к эндпоинту `{bulk_url}` '
+        'должен вернуть ответ со статус-кодом 200.'
+    )
+    data = response.json()
+    assert [project['name'] for project in data] == ['first', 'second'], (
+        'В ответе должны быть созданные проекты в порядке создания.'
+    )
+    assert [project['invested_amount'] for project in data] == [1500, 600], (
+        'Накопленные пожертвования должны распределяться по новым проектам '
+        'в порядке FIFO.'
+    )
+    assert data[0]['fully_invested'] and 'close_date' in data[0], (
+        'Полностью инвестированный проект должен быть закрыт.'
+    )
+
+
+@pytest.mark.parametrize('json_data', [
+    [
+        {'name': 'twin', 'description': 'First', 'full_amount': 10},
+        {'name': 'twin', 'description': 'Second', 'full_amount': 10},
+    ],
+    [
+        {'name': 'new', 'description': 'New', 'full_amount': 10},
+        {'name': 'chimichangas4life', 'description': 'Old', 'full_amount': 10},
+    ],
+])
+@pytest.mark.usefixtures('charity_project')
+def test_create_charity_projects_bulk_same_name(superuser_client, json_data):
+    response = superuser_client.post(PROJECTS_URL + 'bulk', json=json_data)
+    assert response.status_code == 400, (
+        'При массовом создании проектов с повторяющимися или уже '
+        'существующими именами должен возвращаться статус-код 400.'
+    )
+    projects = superuser_client.get(PROJECTS_URL).json()
+    assert len(projects) == 1, (
+        'При ошибке массового создания не должно создаваться ни одного '
+        'проекта.'
+    )
+
+
+def test_update_charity_project_keep_name(superuser_client, charity_project):
+    response = superuser_client.patch(
+        PROJECT_DETAILS_URL.format(project_id=charity_project.id),
+        json={'name': charity_project.name, 'full_amount': 2000000},
+    )
+    assert response.status_code == 200, (
+        'PATCH-запрос, который оставляет проекту его же название, '
+        'не должен считаться созданием дубликата.'
+    )
+
+
+def test_get_all_charity_projects_not_modified(superuser_client,
+                                               charity_project,
+                                               sql_statements):
+    response = superuser_client.get(PROJECTS_URL)
+    etag = response.headers.get('etag')
+    assert etag, (
+        f'Ответ на GET-запрос к эндпоинту `{PROJECTS_URL}` должен '
+        'содержать заголовок ETag.'
+    )
+    with sql_statements() as statements:
+        not_modified = superuser_client.get(
+            PROJECTS_URL, headers={'If-None-Match': etag}
+        )
+        cached = superuser_client.get(PROJECTS_URL)
+    assert not_modified.status_code == 304, (
+        'Запрос с актуальным If-None-Match должен получать ответ 304.'
+    )
+    assert cached.json() == response.json(), (
+        'Повторный запрос должен получать тот же список проектов.'
+    )
+    assert not statements, (
+        'Ответ 304 и ответ из кэша не должны обращаться к БД.'
+    )
+    superuser_client.patch(
+        PROJECT_DETAILS_URL.format(project_id=charity_project.id),
+        json={'name': 'Renamed'},
+    )
+    response = superuser_client.get(
+        PROJECTS_URL, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200, (
+        'После изменения проекта старый ETag не должен давать ответ 304.'
+    )
+    assert response.json()[0]['name'] == 'Renamed', (
+        'После изменения проекта список должен перечитываться из БД.'
+    )
+
+
+def test_get_all_charity_projects_cache_ttl(
+    superuser_client, charity_project, mixer, monkeypatch
+):
+    response = superuser_client.get(PROJECTS_URL)
+    etag = response.headers['ETag']
+    # Проект, созданный в обход сервиса, как из другого процесса.
+    mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='nunchaku', description='Created by another worker',
+        full_amount=100,
+    )
+    cached = superuser_client.get(PROJECTS_URL)
+    assert len(cached.json()) == 1, (
+        'До истечения TTL список проектов должен отдаваться из кэша.'
+    )
+    monkeypatch.setattr(project_list_cache, 'ttl', 0)
+    response = superuser_client.get(
+        PROJECTS_URL, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200, (
+        'После истечения TTL старый ETag не должен давать ответ 304.'
+    )
+    assert len(response.json()) == 2, (
+        'После истечения TTL кэша список проектов должен перечитываться '
+        'из БД, даже если изменения сделаны другим процессом.'
+    )
+
+
+@pytest.mark.usefixtures('charity_project', 'charity_project_nunchaku')
+def test_get_all_charity_projects_fast_json(superuser_client, monkeypatch):
+    fast = superuser_client.get(PROJECTS_URL)
+    project_list_cache.invalidate()
+    monkeypatch.setattr(settings, 'fast_json', False)
+    slow = superuser_client.get(PROJECTS_URL)
+    assert fast.content == slow.content, (
+        'Сериализация через orjson должна давать тот же JSON, что и '
+        'сериализация через схему ответа.'
+    )
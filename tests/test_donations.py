@@ -1,8 +1,12 @@
+import csv
+import json
 import time
 from datetime import datetime
 
 import pytest
 
+from app.core.config import settings
+
 DONATIONS_URL = '/donation/'
 DONATON_DETAILS_URL = DONATIONS_URL + '{donation_id}'
 MY_DONATIONS_URL = DONATIONS_URL + 'my'
@@ -221,3 +225,173 @@ def test_create_donation_check_create_date(user_client):
         'Убедитесь, что при неодновременном создании двух пожертвований '
         'у них отличаются значения в поле `create_date`.'
     )
+
+
+def test_get_all_donations_empty_page(
+    superuser_client, donation, another_donation
+):
+    response = superuser_client.get(
+        DONATIONS_URL, params={'after': another_donation.id}
+    )
+    assert response.status_code == 200 and response.json() == [], (
+        'Страница пожертвований после последней должна возвращать пустой '
+        'список, а не ошибку 404.'
+    )
+    response = superuser_client.get(DONATIONS_URL, params={'user_id': 3})
+    assert response.status_code == 200 and response.json() == [], (
+        'Если под фильтр не попало ни одно пожертвование, должен '
+        'возвращаться пустой список, а не ошибка 404.'
+    )
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_get_all_donations_filters(superuser_client):
+    response = superuser_client.get(DONATIONS_URL, params={'user_id': 1})
+    data = response.json()
+    assert [donation['user_id'] for donation in data] == [1], (
+        'Параметр `user_id` должен фильтровать пожертвования по автору.'
+    )
+    response = superuser_client.get(
+        DONATIONS_URL, params={'created_from': '2012-01-01T00:00:00'}
+    )
+    data = response.json()
+    assert [donation['comment'] for donation in data] == ['From admin'], (
+        'Параметр `created_from` должен отсекать более ранние пожертвования.'
+    )
+    response = superuser_client.get(
+        DONATIONS_URL, params={'created_to': '2012-01-01T00:00:00'}
+    )
+    data = response.json()
+    assert [donation['user_id'] for donation in data] == [2], (
+        'Параметр `created_to` должен отсекать более поздние пожертвования.'
+    )
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_export_donations(superuser_client):
+    export_url = DONATIONS_URL + 'export'
+    response = superuser_client.get(export_url)
+    assert response.status_code == 200, (
+        f'GET-запрос суперпользователя к эндпоинту `{export_url}` '
+        'должен вернуть ответ со статус-кодом 200.'
+    )
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert exported == superuser_client.get(DONATIONS_URL).json(), (
+        'Выгрузка в формате NDJSON должна содержать те же поля и значения, '
+        f'что и ответ эндпоинта `{DONATIONS_URL}`.'
+    )
+    response = superuser_client.get(
+        export_url, params={'export_format': 'csv'}
+    )
+    rows = list(csv.reader(response.text.splitlines()))
+    assert rows[0] == list(exported[0].keys()), (
+        'Первая строка выгрузки в формате CSV должна содержать названия полей.'
+    )
+    assert len(rows) == 3, (
+        'Выгрузка в формате CSV должна содержать строку на каждое '
+        'пожертвование.'
+    )
+
+
+def test_export_donations_usual_user(user_client):
+    response = user_client.get(DONATIONS_URL + 'export')
+    assert response.status_code == 403, (
+        'Выгрузка пожертвований должна быть доступна только суперпользователю.'
+    )
+
+
+def test_import_donations(superuser_client, charity_project, mixer):
+    mixer.blend('app.models.user.User', id=2)
+    import_url = DONATIONS_URL + 'bulk'
+    response = superuser_client.post(import_url, json=[
+        {'full_amount': 400000, 'comment': 'Bank transfer'},
+        {'full_amount': 400000, 'user_id': 2},
+    ])
+    assert response.status_code == 200, (
+        f'POST-запрос суперпользователя к эндпоинту `{import_url}` '
+        'должен вернуть ответ со статус-кодом 200.'
+    )
+    assert response.json() == {'created': 2, 'invested_amount': 800000}, (
+        'Загруженные пожертвования должны распределяться по открытым '
+        'проектам.'
+    )
+    ndjson = '{"full_amount": 400000}\n{"full_amount": 5}\n'
+    response = superuser_client.post(
+        import_url,
+        data=ndjson,
+        headers={'Content-Type': 'application/x-ndjson'}
+    )
+    assert response.json() == {'created': 2, 'invested_amount': 200000}, (
+        'Эндпоинт должен принимать пожертвования в формате NDJSON.'
+    )
+    assert charity_project.fully_invested, (
+        'Загруженные пожертвования должны закрыть проект.'
+    )
+    donations = superuser_client.get(DONATIONS_URL).json()
+    assert [donation['user_id'] for donation in donations] == [1, 2, 1, 1], (
+        'Пожертвования без `user_id` должны записываться на суперпользователя.'
+    )
+
+
+@pytest.mark.parametrize('json_data', [
+    [{'full_amount': 10}, {'full_amount': -1}],
+    [{'comment': 'No amount'}],
+    {'full_amount': 10},
+])
+def test_import_donations_invalid(superuser_client, json_data):
+    response = superuser_client.post(DONATIONS_URL + 'bulk', json=json_data)
+    assert response.status_code == 422, (
+        'При некорректных данных массовая загрузка пожертвований должна '
+        'возвращать статус-код 422.'
+    )
+    response = superuser_client.get(DONATIONS_URL)
+    assert response.status_code == 404, (
+        'При некорректных данных не должно создаваться ни одного '
+        'пожертвования.'
+    )
+
+
+def test_import_donations_unknown_user(superuser_client, mixer):
+    mixer.blend('app.models.user.User', id=2)
+    response = superuser_client.post(DONATIONS_URL + 'bulk', json=[
+        {'full_amount': 10, 'user_id': 2},
+        {'full_amount': 10, 'user_id': 7},
+        {'full_amount': 10, 'user_id': 5},
+    ])
+    assert response.status_code == 400, (
+        'Массовая загрузка пожертвований несуществующих пользователей '
+        'должна возвращать статус-код 400.'
+    )
+    assert response.json()['detail'].endswith('5, 7'), (
+        'В ответе должны перечисляться неизвестные `user_id`.'
+    )
+    response = superuser_client.get(DONATIONS_URL)
+    assert response.status_code == 404, (
+        'При неизвестных `user_id` не должно создаваться ни одного '
+        'пожертвования.'
+    )
+
+
+def test_import_donations_usual_user(user_client):
+    response = user_client.post(
+        DONATIONS_URL + 'bulk', json=[{'full_amount': 10}]
+    )
+    assert response.status_code == 403, (
+        'Массовая загрузка пожертвований должна быть доступна только '
+        'суперпользователю.'
+    )
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_get_all_donations_fast_json(superuser_client, monkeypatch):
+    fast = superuser_client.get(DONATIONS_URL)
+    monkeypatch.setattr(settings, 'fast_json', False)
+    slow = superuser_client.get(DONATIONS_URL)
+    assert fast.status_code == slow.status_code == 200, (
+        'Список пожертвований должен отдаваться при любом способе '
+        'сериализации.'
+    )
+    assert fast.content == slow.content, (
+        'Сериализация через orjson должна давать тот же JSON, что и '
+        'сериализация через схему ответа.'
+    )
@@ -0,0 +1,52 @@
+import pytest
+from conftest import TestingSessionLocal, app, current_user
+from fixtures.user import superuser
+
+from app.services.fund_stats import reconcile_fund_stats
+
+STATS_URL = '/stats/'
+PROJECTS_URL = '/charity_project/'
+DONATION_URL = '/donation/'
+
+
+def test_fund_stats_follow_investing(superuser_client):
+    app.dependency_overrides[current_user] = lambda: superuser
+    superuser_client.post(PROJECTS_URL, json={
+        'name': 'first', 'description': 'First project', 'full_amount': 1000
+    })
+    superuser_client.post(PROJECTS_URL, json={
+        'name': 'second', 'description': 'Second project', 'full_amount': 800
+    })
+    superuser_client.post(DONATION_URL, json={'full_amount': 1500})
+    superuser_client.post(DONATION_URL, json={'full_amount': 700})
+    response = superuser_client.get(STATS_URL)
+    assert response.status_code == 200, (
+        f'GET-запрос суперпользователя к эндпоинту `{STATS_URL}` '
+        'должен вернуть ответ со статус-кодом 200.'
+    )
+    assert response.json() == {
+        'total_raised': 2200,
+        'total_invested': 1800,
+        'open_project_count': 0,
+        'uninvested_balance': 400,
+    }, 'Агрегаты фонда должны обновляться при создании и инвестировании.'
+
+
+def test_fund_stats_usual_user(user_client):
+    response = user_client.get(STATS_URL)
+    assert response.status_code == 403, (
+        'Агрегаты фонда должны быть доступны только суперпользователю.'
+    )
+
+
+@pytest.mark.usefixtures(
+    'charity_project_little_invested', 'small_fully_charity_project', 'donation'
+)
+async def test_reconcile_fund_stats():
+    stats = await reconcile_fund_stats(TestingSessionLocal)
+    assert stats.dict() == {
+        'total_raised': 100,
+        'total_invested': 0,
+        'open_project_count': 1,
+        'uninvested_balance': 100,
+    }, 'Пересчёт должен восстанавливать агрегаты по данным таблиц.'
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import app, current_user
+from fixtures.user import superuser
+from sqlalchemy import Integer
+from sqlalchemy.dialects import postgresql
+
+from app.core.google_client import get_service
+from app.crud import charity_project_crud
+from app.services.google_sheets import google_service, report_cache
+
+REPORT_URL = '/google/'
+
+
+class FakeResource:
+    """Ресурс Google API, который возвращает описание запроса."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __getattr__(self, name):
+        return FakeResource(f'{self.path}.{name}')
+
+    def __call__(self, **kwargs):
+        return {'method': self.path, **kwargs}
+
+
+class FakeAiogoogle:
+    """Локальная замена `Aiogoogle` без обращений к сети."""
+
+    def __init__(self):
+        self.discovered = []
+        self.requests = []
+
+    async def discover(self, api_name, api_version):
+        self.discovered.append((api_name, api_version))
+        return FakeResource(api_name)
+
+    async def as_service_account(self, request):
+        self.requests.append(request)
+        return {'spreadsheetId': 'spreadsheet'}
+
+
+@pytest.fixture
+def fake_aiogoogle(superuser_client, monkeypatch):
+    aiogoogle = FakeAiogoogle()
+    monkeypatch.setattr(google_service, '_apis', {})
+    app.dependency_overrides[get_service] = lambda: aiogoogle
+    return aiogoogle
+
+
+@pytest.mark.usefixtures('closed_charity_project', 'charity_project_nunchaku')
+def test_report_discovery_is_cached(superuser_client, fake_aiogoogle):
+    for _ in range(3):
+        response = superuser_client.post(REPORT_URL)
+        assert response.status_code == 200, (
+            f'POST-запрос суперпользователя к эндпоинту `{REPORT_URL}` '
+            'должен вернуть ответ со статус-кодом 200.'
+        )
+    assert sorted(fake_aiogoogle.discovered) == [
+        ('drive', 'v3'), ('sheets', 'v4')
+    ], 'Discovery-документы Google API должны загружаться один раз.'
+    assert len(fake_aiogoogle.requests) == 9, (
+        'Каждый отчёт должен создавать таблицу, выдавать права и '
+        'записывать данные.'
+    )
+    assert [project['name'] for project in response.json()] == [
+        'chimichangas4life'
+    ], 'В отчёт должны попадать только закрытые проекты.'
+
+
+@pytest.mark.usefixtures('closed_charity_project', 'charity_project_nunchaku')
+def test_report_cache_invalidated_on_project_close(
+    superuser_client, fake_aiogoogle
+):
+    superuser_client.post(REPORT_URL)
+    app.dependency_overrides[current_user] = lambda: superuser
+    superuser_client.post('/donation/', json={'full_amount': 5000000})
+    response = superuser_client.post(REPORT_URL)
+    assert sorted(project['name'] for project in response.json()) == [
+        'chimichangas4life', 'nunchaku'
+    ], 'После закрытия проекта отчёт должен содержать новые данные.'
+
+
+@pytest.mark.usefixtures('closed_charity_project')
+def test_report_cache_ttl(superuser_client, fake_aiogoogle, mixer, monkeypatch):
+    superuser_client.post(REPORT_URL)
+    # Проект, закрытый в обход сервиса, как в другом процессе.
+    mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='nunchaku', description='Closed by another worker',
+        full_amount=100, invested_amount=100, fully_invested=True,
+        create_date=datetime(2010, 10, 10),
+        close_date=datetime(2010, 10, 11),
+    )
+    response = superuser_client.post(REPORT_URL)
+    assert len(response.json()) == 1, (
+        'До истечения TTL отчёт должен строиться по кэшу.'
+    )
+    monkeypatch.setattr(report_cache, 'ttl', 0)
+    response = superuser_client.post(REPORT_URL)
+    assert sorted(project['name'] for project in response.json()) == [
+        'chimichangas4life', 'nunchaku'
+    ], (
+        'После истечения TTL кэша в отчёт должны попадать проекты, '
+        'закрытые другими процессами.'
+    )
+
+
+def test_report_sorted_by_duration_and_not_truncated(
+    superuser_client, fake_aiogoogle, mixer
+):
+    projects_count = 40
+    create_date = datetime(2010, 10, 10)
+    for number in range(projects_count):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=f'project {number}',
+            description='Closed project',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=create_date,
+            close_date=create_date + timedelta(days=projects_count - number),
+        )
+    response = superuser_client.post(REPORT_URL)
+    names = [project['name'] for project in response.json()]
+    assert names == [
+        f'project {number}' for number in reversed(range(projects_count))
+    ], 'Проекты в отчёте должны быть упорядочены по времени сбора средств.'
+    update_request = fake_aiogoogle.requests[-1]
+    assert update_request['range'] == f'A1:C{projects_count + 3}', (
+        'Диапазон записи в таблицу должен соответствовать размеру отчёта.'
+    )
+    assert len(update_request['json']['values']) == projects_count + 3, (
+        'В таблицу должны записываться все проекты отчёта.'
+    )
+    grid = fake_aiogoogle.requests[0]['json']['sheets'][0]['properties']
+    assert grid['gridProperties'] == {
+        'rowCount': projects_count + 3, 'columnCount': 3
+    }, 'Размер листа должен соответствовать размеру отчёта.'
+
+
+def test_report_duration_is_integer_in_postgresql():
+    duration = charity_project_crud.completion_duration()
+    compiled = str(duration.compile(dialect=postgresql.dialect()))
+    assert compiled.startswith('CAST(') and compiled.endswith('AS INTEGER)'), (
+        'Время сбора должно приводиться к integer в запросе: PostgreSQL '
+        'возвращает EXTRACT(EPOCH ...) как numeric.'
+    )
+    assert isinstance(duration.type, Integer), (
+        'Результат выражения времени сбора должен иметь тип Integer.'
+    )
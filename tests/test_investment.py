@@ -1,4 +1,21 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
 import pytest
+from conftest import TEST_DB, TestingSessionLocal
+from fixtures.user import user
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models import CharityProject, Donation, Investment
+from app.schemas import CharityProjectCreate, DonationCreate
+from app.services.allocator import run_allocator
+from app.services.donation_service import InvestingService
+from app.services.matching import batch_matching_available, match_amounts
+from app.services.utils import (
+    OPEN_OBJECTS_CHUNK_SIZE, allocation_lock, get_open_projects
+)
 
 DONATION_URL = '/donation/'
 PROJECTS_URL = '/charity_project/'
@@ -60,3 +77,364 @@ def test_donation_to_little_invest_project(
     )
     assert not charity_project_nunchaku.fully_invested, common_asser_msg
     assert charity_project_nunchaku.invested_amount == 0, common_asser_msg
+
+
+def test_donation_invested_to_several_projects(
+        user_client, charity_project, charity_project_nunchaku
+):
+    common_asser_msg = (
+        'При тестировании создано два пустых проекта. '
+        'Затем тест создает пожертвование, которое больше суммы первого '
+        'проекта. Первый проект должен закрыться, а остаток пожертвования '
+        'должен перейти во второй проект.'
+    )
+    response = user_client.post(DONATION_URL, json={'full_amount': 1500000})
+    assert response.status_code == 200, common_asser_msg
+    assert charity_project.fully_invested, common_asser_msg
+    assert charity_project.close_date is not None, common_asser_msg
+    assert not charity_project_nunchaku.fully_invested, common_asser_msg
+    assert charity_project_nunchaku.invested_amount == 500000, (
+        common_asser_msg
+    )
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_project_collects_several_donations(superuser_client):
+    common_asser_msg = (
+        'При тестировании создано два пожертвования. '
+        'Затем тест создает проект, сумма которого равна сумме обоих '
+        'пожертвований. Проект должен быть полностью инвестирован.'
+    )
+    response = superuser_client.post(PROJECTS_URL, json={
+        'name': 'many donations',
+        'description': 'Collect them all',
+        'full_amount': 2100,
+    })
+    data = response.json()
+    assert data['invested_amount'] == 2100, common_asser_msg
+    assert data['fully_invested'], common_asser_msg
+    donations = superuser_client.get(DONATION_URL).json()
+    assert all(donation['fully_invested'] for donation in donations), (
+        common_asser_msg
+    )
+
+
+@pytest.mark.usefixtures('charity_project', 'charity_project_nunchaku')
+def test_donation_sql_statements_count(user_client, mixer, sql_statements):
+    mixer.blend('app.models.fund_stats.FundStats', id=1)
+    # BEGIN IMMEDIATE в SQLite начинает транзакцию, а не выполняет запрос.
+    with sql_statements(
+        lambda statement: not statement.startswith('BEGIN')
+    ) as statements:
+        user_client.post(DONATION_URL, json={'full_amount': 1500000})
+    assert len(statements) <= 8, (
+        'Создание пожертвования, закрывающего один проект и частично '
+        'инвестирующего второй, должно выполняться одной транзакцией: '
+        'INSERT пожертвования, SELECT открытых проектов, INSERT вложений, '
+        'UPDATE проектов, пожертвования и агрегатов фонда, SELECT для '
+        'обновления объекта. '
+        f'Выполнено запросов: {len(statements)}.'
+    )
+
+
+async def test_concurrent_donations_do_not_overfund_projects():
+    projects_count, donations_count, donation_amount = 10, 300, 37
+    async with TestingSessionLocal() as session:
+        session.add_all([
+            CharityProject(
+                name=f'project {number}',
+                description='Concurrent investing',
+                full_amount=1000,
+                create_date=datetime(2020, 1, 1) + timedelta(minutes=number),
+            ) for number in range(projects_count)
+        ])
+        await session.commit()
+
+    async def donate():
+        async with TestingSessionLocal() as session:
+            await InvestingService(session).create_new_donation(
+                DonationCreate(full_amount=donation_amount), user
+            )
+
+    await asyncio.gather(*(donate() for _ in range(donations_count)))
+    async with TestingSessionLocal() as session:
+        projects = (await session.execute(select(CharityProject))).scalars()
+        projects = projects.all()
+        donations_invested = await session.scalar(
+            select(func.sum(Donation.invested_amount))
+        )
+    common_asser_msg = (
+        f'При тестировании {donations_count} пожертвований создаются '
+        'одновременно. Проекты не должны получать больше `full_amount`, '
+        'а сумма вложений проектов должна совпадать с суммой распределённых '
+        'пожертвований.'
+    )
+    assert all(
+        project.invested_amount <= project.full_amount
+        for project in projects
+    ), common_asser_msg
+    assert all(project.fully_invested for project in projects), (
+        common_asser_msg
+    )
+    assert donations_invested == sum(
+        project.invested_amount for project in projects
+    ), common_asser_msg
+
+
+async def test_background_allocation(monkeypatch):
+    monkeypatch.setattr(settings, 'background_allocation', True)
+    monkeypatch.setattr(settings, 'allocation_interval', 0.01)
+    async with TestingSessionLocal() as session:
+        service = InvestingService(session)
+        project = await service.create_new_project(CharityProjectCreate(
+            name='background', description='Background', full_amount=100
+        ))
+        project_id, project_invested = project.id, project.invested_amount
+        donation = await service.create_new_donation(
+            DonationCreate(full_amount=150), user
+        )
+        assert project_invested == donation.invested_amount == 0, (
+            'В режиме фонового распределения создание пожертвования и '
+            'проекта не должно распределять средства.'
+        )
+        donation_id = donation.id
+    allocator = asyncio.create_task(run_allocator(TestingSessionLocal))
+    try:
+        for _ in range(100):
+            async with TestingSessionLocal() as session:
+                project = await session.get(CharityProject, project_id)
+                donation = await session.get(Donation, donation_id)
+            if project.fully_invested:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        allocator.cancel()
+    assert project.fully_invested, (
+        'Фоновый распределитель должен закрыть проект накопившимися '
+        'пожертвованиями.'
+    )
+    assert donation.invested_amount == 100, (
+        'Фоновый распределитель должен вложить в проект часть пожертвования.'
+    )
+
+
+async def test_background_allocation_survives_errors(monkeypatch, caplog):
+    monkeypatch.setattr(settings, 'allocation_interval', 0.01)
+    calls = []
+
+    def failing_session_factory():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError('Сбой распределения')
+        return TestingSessionLocal()
+
+    allocator = asyncio.create_task(run_allocator(failing_session_factory))
+    try:
+        for _ in range(100):
+            if len(calls) > 1:
+                break
+            await asyncio.sleep(0.01)
+        assert not allocator.done(), (
+            'Фоновый распределитель должен продолжать работу после ошибки.'
+        )
+    finally:
+        allocator.cancel()
+    assert len(calls) > 1, (
+        'После ошибки фоновый распределитель должен повторять распределение.'
+    )
+    assert 'Сбой распределения' in caplog.text, (
+        'Ошибка фонового распределителя должна записываться в журнал.'
+    )
+
+
+def test_donation_status(user_client, donation, another_donation):
+    response = user_client.get(DONATION_URL + f'{donation.id}/status')
+    assert response.status_code == 200, (
+        'Автор пожертвования должен получать статус его распределения.'
+    )
+    assert response.json()['invested_amount'] == 0, (
+        'Статус пожертвования должен содержать распределённую сумму.'
+    )
+    response = user_client.get(
+        DONATION_URL + f'{another_donation.id}/status'
+    )
+    assert response.status_code == 404, (
+        'Статус чужого пожертвования не должен быть доступен пользователю.'
+    )
+
+
+@pytest.mark.usefixtures('charity_project', 'donation')
+def test_allocation_skips_text_columns(user_client, sql_statements):
+    with sql_statements(
+        lambda statement: statement.startswith('SELECT')
+    ) as statements:
+        user_client.post(DONATION_URL, json={'full_amount': 100})
+    open_projects = [
+        statement for statement in statements
+        if 'FROM charityproject' in statement
+    ]
+    assert open_projects and not any(
+        'charityproject.description' in statement
+        for statement in open_projects
+    ), (
+        'Выборка открытых проектов для распределения средств не должна '
+        'загружать описания проектов.'
+    )
+
+
+def test_donation_allocations(user_client, charity_project,
+                              charity_project_nunchaku):
+    donation = user_client.post(
+        DONATION_URL, json={'full_amount': 1500000}
+    ).json()
+    response = user_client.get(DONATION_URL + f'{donation["id"]}/allocations')
+    assert response.status_code == 200, (
+        'Автор пожертвования должен получать список его вложений в проекты.'
+    )
+    allocations = [
+        (allocation['project_id'], allocation['amount'])
+        for allocation in response.json()
+    ]
+    assert allocations == [
+        (charity_project.id, 1000000), (charity_project_nunchaku.id, 500000)
+    ], (
+        'Пожертвование, закрывшее первый проект и частично вложенное во '
+        'второй, должно иметь две записи о вложениях в порядке распределения.'
+    )
+
+
+def test_donation_allocations_not_author(user_client, another_donation):
+    response = user_client.get(
+        DONATION_URL + f'{another_donation.id}/allocations'
+    )
+    assert response.status_code == 404, (
+        'Вложения чужого пожертвования не должны быть доступны пользователю.'
+    )
+
+
+@pytest.mark.parametrize('donation_rests, project_rests, transfers', [
+    ([100], [], []),
+    ([], [100], []),
+    ([30, 70], [100], [(0, 0, 30), (1, 0, 70)]),
+    ([150], [100, 100], [(0, 0, 100), (0, 1, 50)]),
+    ([50, 50, 50], [60, 20], [(0, 0, 50), (1, 0, 10), (1, 1, 20)]),
+])
+def test_match_amounts(donation_rests, project_rests, transfers):
+    assert list(match_amounts(donation_rests, project_rests)) == transfers, (
+        'Остатки пожертвований должны распределяться по проектам в порядке '
+        'FIFO: каждое пожертвование заполняет самый старый открытый проект.'
+    )
+
+
+@pytest.mark.parametrize('allocation_engine', [
+    'python',
+    pytest.param('numpy', marks=pytest.mark.skipif(
+        not batch_matching_available(), reason='NumPy не установлен'
+    )),
+])
+async def test_allocate_pending_engines(monkeypatch, allocation_engine):
+    monkeypatch.setattr(settings, 'allocation_engine', allocation_engine)
+    start_date = datetime(2020, 1, 1)
+    async with TestingSessionLocal() as session:
+        session.add_all([
+            CharityProject(
+                name=f'project {number}', description='Batch',
+                full_amount=full_amount,
+                create_date=start_date + timedelta(minutes=number),
+            ) for number, full_amount in enumerate((100, 50, 300))
+        ] + [
+            Donation(
+                full_amount=full_amount, user_id=user.id,
+                create_date=start_date + timedelta(minutes=number),
+            ) for number, full_amount in enumerate((30, 120, 40, 10))
+        ])
+        await session.commit()
+        invested = await InvestingService(session).allocate_pending(100)
+    async with TestingSessionLocal() as session:
+        projects = (await session.execute(
+            select(CharityProject).order_by(CharityProject.id)
+        )).scalars().all()
+        donations = (await session.execute(
+            select(Donation).order_by(Donation.id)
+        )).scalars().all()
+        investments = (await session.execute(
+            select(
+                Investment.donation_id, Investment.project_id,
+                Investment.amount
+            ).order_by(Investment.id)
+        )).all()
+    common_asser_msg = (
+        'Распределение накопившихся пожертвований должно давать один и тот '
+        f'же результат при `ALLOCATION_ENGINE={allocation_engine}`.'
+    )
+    assert invested == 200, common_asser_msg
+    assert [
+        (project.invested_amount, project.fully_invested)
+        for project in projects
+    ] == [(100, True), (50, True), (50, False)], common_asser_msg
+    assert all(project.close_date for project in projects[:2]), (
+        common_asser_msg
+    )
+    assert all(donation.fully_invested for donation in donations), (
+        common_asser_msg
+    )
+    assert [tuple(row) for row in investments] == [
+        (1, 1, 30), (2, 1, 70), (2, 2, 50), (3, 3, 40), (4, 3, 10)
+    ], common_asser_msg
+
+
+@pytest.mark.parametrize('amount, expected_count', [
+    (150, OPEN_OBJECTS_CHUNK_SIZE),
+    (100 * OPEN_OBJECTS_CHUNK_SIZE + 1, OPEN_OBJECTS_CHUNK_SIZE + 10),
+])
+async def test_open_projects_for_amount(amount, expected_count):
+    projects_count = OPEN_OBJECTS_CHUNK_SIZE + 10
+    async with TestingSessionLocal() as session:
+        session.add_all([
+            CharityProject(
+                name=f'project {number}', description='Chunks',
+                full_amount=100,
+                create_date=datetime(2020, 1, 1) + timedelta(minutes=number),
+            ) for number in range(projects_count)
+        ])
+        await session.commit()
+        open_projects = await get_open_projects(session, amount=amount)
+    assert [project.name for project in open_projects] == [
+        f'project {number}' for number in range(expected_count)
+    ], (
+        'Для нового объекта открытые проекты должны выбираться порциями '
+        'в порядке FIFO, пока их остатков не хватит на его сумму: '
+        'блокироваться должны только нужные объекты.'
+    )
+
+
+def test_numpy_engine_unavailable_warning(monkeypatch, caplog):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    monkeypatch.setattr(settings, 'allocation_engine', 'numpy')
+    monkeypatch.setattr('app.main.batch_matching_available', lambda: False)
+    with TestClient(app):
+        pass
+    assert 'NumPy не установлен' in caplog.text, (
+        'Если `ALLOCATION_ENGINE=numpy`, а NumPy не установлен, при запуске '
+        'должно выводиться предупреждение.'
+    )
+
+
+async def test_sqlite_allocation_begins_immediate():
+    async with TestingSessionLocal() as session:
+        async with allocation_lock(session):
+            other_process = sqlite3.connect(TEST_DB, timeout=0)
+            try:
+                other_process.execute('BEGIN IMMEDIATE')
+                locked = False
+            except sqlite3.OperationalError:
+                locked = True
+            finally:
+                other_process.close()
+    assert locked, (
+        'В SQLite распределение должно начинать транзакцию с BEGIN '
+        'IMMEDIATE, чтобы запись сериализовалась между процессами.'
+    )
@@ -0,0 +1,88 @@
+import pytest
+from conftest import engine
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.db import (
+    _after_cursor_execute, _before_cursor_execute, instrument_engine,
+    instrumentation_enabled
+)
+from app.core.metrics import metrics_registry
+
+METRICS_URL = '/metrics'
+PROJECTS_ROUTE = 'method="GET",route="/charity_project/"'
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(settings, 'metrics_enabled', True)
+    metrics_registry.clear()
+    instrument_engine(engine.sync_engine)
+    yield metrics_registry
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', _before_cursor_execute
+    )
+    event.remove(
+        engine.sync_engine, 'after_cursor_execute', _after_cursor_execute
+    )
+
+
+@pytest.mark.usefixtures('charity_project')
+def test_metrics(user_client, metrics):
+    for _ in range(2):
+        user_client.get('/charity_project/')
+    response = user_client.get(METRICS_URL)
+    assert response.status_code == 200, (
+        f'При включённом сборе метрик эндпоинт `{METRICS_URL}` '
+        'должен быть доступен.'
+    )
+    assert response.headers['content-type'].startswith('text/plain'), (
+        'Метрики должны отдаваться в текстовом формате Prometheus.'
+    )
+    lines = response.text.splitlines()
+    assert (
+        f'http_request_duration_seconds_count{{{PROJECTS_ROUTE}}} 2' in lines
+    ), 'Метрики должны учитывать время каждого запроса к маршруту.'
+    assert (
+        f'http_request_sql_statements_sum{{{PROJECTS_ROUTE}}} 1' in lines
+    ), (
+        'Метрики должны учитывать число SQL-запросов: первый запрос списка '
+        'проектов читает БД, второй отдаётся из кэша.'
+    )
+    assert any(
+        line.startswith(f'http_request_sql_seconds_total{{{PROJECTS_ROUTE}}}')
+        for line in lines
+    ), 'Метрики должны учитывать суммарное время SQL-запросов.'
+
+
+def test_metrics_route_template(user_client, metrics):
+    user_client.get('/donation/1/status')
+    assert (
+        'route="/donation/{donation_id}/status"'
+        in user_client.get(METRICS_URL).text
+    ), 'Метки маршрутов должны содержать шаблон пути, а не сам путь.'
+
+
+def test_metrics_disabled(user_client):
+    response = user_client.get(METRICS_URL)
+    assert response.status_code == 404, (
+        'При отключённом сборе метрик эндпоинт метрик должен быть недоступен.'
+    )
+
+
+@pytest.mark.parametrize('metrics_enabled, slow_query_threshold, enabled', [
+    (False, None, False),
+    (True, None, True),
+    (False, 0.5, True),
+])
+def test_instrumentation_enabled(
+    monkeypatch, metrics_enabled, slow_query_threshold, enabled
+):
+    monkeypatch.setattr(settings, 'metrics_enabled', metrics_enabled)
+    monkeypatch.setattr(
+        settings, 'slow_query_threshold', slow_query_threshold
+    )
+    assert instrumentation_enabled() is enabled, (
+        'Хуки курсора должны подключаться, только если включены метрики '
+        'или задан порог медленных запросов.'
+    )
@@ -0,0 +1,145 @@
+import pytest
+from conftest import engine
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.db import (
+    _after_cursor_execute, _before_cursor_execute, instrument_engine
+)
+from app.core.slow_queries import REDACTED, slow_query_log
+
+SLOW_QUERIES_URL = '/slow_queries/'
+
+
+@pytest.fixture
+def slow_queries(monkeypatch):
+    monkeypatch.setattr(settings, 'slow_query_threshold', 0)
+    slow_query_log.clear()
+    instrument_engine(engine.sync_engine)
+    yield slow_query_log
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', _before_cursor_execute
+    )
+    event.remove(
+        engine.sync_engine, 'after_cursor_execute', _after_cursor_execute
+    )
+    slow_query_log.clear()
+
+
+@pytest.mark.usefixtures('charity_project')
+def test_slow_query_logged(user_client, slow_queries):
+    user_client.post('/donation/', json={'full_amount': 100})
+    insert = next(
+        query for query in slow_queries
+        if query['statement'].startswith('INSERT INTO donation')
+    )
+    assert insert['route'] == '/donation/', (
+        'Медленный запрос должен записываться с шаблоном маршрута.'
+    )
+    assert insert['caller'].startswith('CRUDDonation.'), (
+        'Медленный запрос должен записываться с вызвавшим его методом CRUD.'
+    )
+    assert REDACTED in insert['parameters'], (
+        'Суммы в параметрах медленного запроса должны скрываться.'
+    )
+    assert 100 not in insert['parameters'], (
+        'Суммы в параметрах медленного запроса должны скрываться.'
+    )
+
+
+@pytest.mark.usefixtures('charity_project')
+def test_slow_queries_explain(superuser_client, slow_queries):
+    superuser_client.get('/charity_project/')
+    response = superuser_client.get(
+        SLOW_QUERIES_URL, params={'with_plan': True}
+    )
+    assert response.status_code == 200, (
+        'Суперпользователь должен получать список медленных запросов.'
+    )
+    select = next(
+        query for query in response.json()
+        if query['statement'].startswith('SELECT')
+    )
+    assert select['plan'], (
+        'По запросу суперпользователя для медленного запроса должен '
+        'выполняться EXPLAIN.'
+    )
+    assert 'raw_parameters' not in select, (
+        'Исходные параметры запроса не должны отдаваться в API.'
+    )
+
+
+@pytest.mark.usefixtures('charity_project')
+def test_slow_executemany_redacted(superuser_client, slow_queries):
+    superuser_client.post('/donation/bulk', json=[
+        {'full_amount': 123456}, {'full_amount': 654321},
+    ])
+    queries = list(slow_queries)
+    for table in ('donation', 'investment'):
+        insert = next(
+            query for query in queries
+            if query['statement'].startswith(f'INSERT INTO {table}')
+        )
+        assert len(insert['parameters']) == 2, (
+            'Параметры executemany должны записываться построчно.'
+        )
+        assert all(REDACTED in row for row in insert['parameters']), (
+            'Суммы должны скрываться в каждой строке executemany.'
+        )
+    assert not any(
+        amount in str(query['parameters'])
+        for query in queries for amount in ('123456', '654321')
+    ), 'Суммы пожертвований не должны попадать в журнал медленных запросов.'
+
+
+@pytest.mark.usefixtures('charity_project')
+def test_slow_fund_stats_update_redacted(user_client, slow_queries):
+    user_client.post('/donation/', json={'full_amount': 100})
+    update = next(
+        query for query in slow_queries
+        if query['statement'].startswith('UPDATE fundstats')
+    )
+    assert [
+        value for value in update['parameters'] if value != REDACTED
+    ] == [0, 1], (
+        'В UPDATE агрегатов фонда должны скрываться все суммы, включая '
+        'параметры арифметических выражений.'
+    )
+
+
+@pytest.mark.usefixtures('charity_project')
+def test_slow_queries_explain_failures(superuser_client, slow_queries):
+    superuser_client.post('/donation/bulk', json=[
+        {'full_amount': 100}, {'full_amount': 200},
+    ])
+    slow_queries.add('EXPLAIN SELECT 1', (), None, 1.0)
+    response = superuser_client.get(
+        SLOW_QUERIES_URL, params={'with_plan': True, 'limit': 100}
+    )
+    assert response.status_code == 200, (
+        'Запросы, для которых EXPLAIN невозможен, не должны ломать '
+        'список медленных запросов.'
+    )
+    queries = response.json()
+    assert queries[0]['plan'] is None, (
+        'Для запроса, который не поддаётся EXPLAIN, план должен быть null.'
+    )
+    insert = next(
+        query for query in queries
+        if query['statement'].startswith('INSERT INTO donation')
+    )
+    assert insert['plan'] is not None, (
+        'EXPLAIN для executemany должен выполняться по первой строке '
+        'параметров.'
+    )
+    assert any(
+        query['plan'] for query in queries
+        if query['statement'].startswith('UPDATE')
+    ), 'После неудачного EXPLAIN планы остальных запросов должны строиться.'
+
+
+def test_slow_queries_usual_user(user_client):
+    response = user_client.get(SLOW_QUERIES_URL)
+    assert response.status_code == 403, (
+        'Медленные запросы должны быть доступны только суперпользователю.'
+    )
@@ -0,0 +1,46 @@
+from app.core.config import settings
+from app.core.user import user_cache
+
+
+def test_current_user_cached(jwt_client, sql_statements):
+    with sql_statements(
+        lambda statement: 'FROM user' in statement
+    ) as user_queries:
+        for _ in range(3):
+            response = jwt_client.get('/users/me')
+            assert response.status_code == 200, (
+                'Авторизованный пользователь должен получать свои данные.'
+            )
+    assert len(user_queries) == 1, (
+        'Пользователь должен загружаться из БД только при первом запросе, '
+        'далее - из кэша.'
+    )
+    assert user_cache.hits == 2, 'Кэш должен учитывать попадания.'
+
+
+def test_user_cache_invalidated_on_update(jwt_client):
+    jwt_client.get('/users/me')
+    response = jwt_client.patch('/users/me', json={'email': 'kitten@fund.ru'})
+    assert response.status_code == 200, (
+        'Пользователь из кэша должен обновляться через PATCH-запрос.'
+    )
+    response = jwt_client.get('/users/me')
+    assert response.json()['email'] == 'kitten@fund.ru', (
+        'После обновления пользователя его данные в кэше должны сбрасываться.'
+    )
+
+
+def test_user_cache_metrics(jwt_client, monkeypatch):
+    monkeypatch.setattr(settings, 'metrics_enabled', True)
+    for _ in range(3):
+        jwt_client.get('/users/me')
+    lines = jwt_client.get('/metrics').text.splitlines()
+    assert 'user_cache_hits_total 2' in lines, (
+        'Эндпоинт метрик должен отдавать число попаданий в кэш пользователей.'
+    )
+    assert 'user_cache_misses_total 1' in lines, (
+        'Эндпоинт метрик должен отдавать число промахов кэша пользователей.'
+    )
+    assert any(
+        line.startswith('user_cache_hit_ratio 0.66') for line in lines
+    ), 'Эндпоинт метрик должен отдавать долю попаданий в кэш пользователей.'